@@ -6,10 +6,12 @@
 - SnapshotResponse: 快照响应模型
 - VideoListResponse: 视频列表响应模型
 - HealthResponse: 健康检查响应模型
+- DetectionObjectMsg / AIDetectionResultMsg: WebSocket 推送用的 msgspec 结构
 """
 from enum import Enum
 from typing import List, Optional
 from datetime import datetime
+import msgspec
 from pydantic import BaseModel, Field
 
 
@@ -32,8 +34,7 @@ class ServerStatus(BaseModel):
 class StatusResponse(BaseModel):
     """状态响应模型"""
     status: ServerStatus = Field(..., description="服务器状态信息")
-    timestamp: datetime = Field(
-        default_factory=datetime.now, description="响应时间戳")
+    timestamp: datetime = Field(..., description="响应时间戳")
 
 
 class SnapshotResponse(BaseModel):
@@ -42,8 +43,7 @@ class SnapshotResponse(BaseModel):
     format: str = Field(..., description="图像格式(如'jpeg')")
     width: int = Field(..., description="图像宽度")
     height: int = Field(..., description="图像高度")
-    timestamp: datetime = Field(
-        default_factory=datetime.now, description="快照时间戳")
+    timestamp: datetime = Field(..., description="快照时间戳")
 
 
 class VideoInfo(BaseModel):
@@ -74,8 +74,7 @@ class HealthResponse(BaseModel):
     """健康检查响应模型"""
     status: HealthStatus = Field(..., description="系统健康状态")
     version: str = Field(..., description="API版本")
-    timestamp: datetime = Field(
-        default_factory=datetime.now, description="检查时间戳")
+    timestamp: datetime = Field(..., description="检查时间戳")
     details: Optional[dict] = Field(default=None, description="详细健康状态信息")
 
 
@@ -83,8 +82,7 @@ class ErrorResponse(BaseModel):
     """错误响应模型"""
     error: str = Field(..., description="错误信息")
     code: int = Field(..., description="错误代码")
-    timestamp: datetime = Field(
-        default_factory=datetime.now, description="错误时间戳")
+    timestamp: datetime = Field(..., description="错误时间戳")
 
 
 class DetectionObject(BaseModel):
@@ -105,3 +103,69 @@ class AIDetectionResult(BaseModel):
     detections: List[DetectionObject] = Field(
         default_factory=list, description="检测到的对象列表")
     error: Optional[str] = Field(None, description="错误信息(如果有)")
+
+
+class DetectionObjectMsg(msgspec.Struct, gc=False):
+    """检测到的对象 (WebSocket 推送用, 字段与 DetectionObject 一致)
+
+    每帧都会创建大量实例且不会形成循环引用，gc=False 使其不被垃圾回收器跟踪。
+    """
+    class_name: str
+    confidence: float
+    x_center: float
+    y_center: float
+    width: float
+    height: float
+
+
+class AIDetectionResultMsg(msgspec.Struct, omit_defaults=True, gc=False):
+    """AI检测结果 (WebSocket 推送用, 字段与 AIDetectionResult 一致)
+
+    error 为 None 时不输出，与 model_dump(exclude_none=True) 的结果保持一致。
+    """
+    frame_id: int
+    timestamp: int
+    fps: float
+    detections: List[DetectionObjectMsg]
+    error: Optional[str] = None
+
+
+class AIDetectionMessage(msgspec.Struct, tag_field="type", tag="ai_detection"):
+    """AI检测结果 WebSocket 消息: {"type": "ai_detection", "data": {...}}"""
+    data: AIDetectionResultMsg
+
+
+class AIDetectionBatchMessage(msgspec.Struct, tag_field="type", tag="ai_detection"):
+    """合并的AI检测结果 WebSocket 消息: {"type": "ai_detection", "batch": [{...}, ...]}"""
+    batch: List[AIDetectionResultMsg]
+
+
+_ai_message_encoder = msgspec.json.Encoder()
+
+
+def encode_ai_detection_message(result: AIDetectionResultMsg) -> bytes:
+    """将AI检测结果编码为 WebSocket 消息的 JSON 字节串
+
+    Args:
+        result: AI检测结果
+
+    Returns:
+        bytes: 编码后的 JSON 消息
+    """
+    return _ai_message_encoder.encode(AIDetectionMessage(data=result))
+
+
+def encode_ai_detection_batch(results: List[AIDetectionResultMsg]) -> bytes:
+    """将一批AI检测结果编码为一条 WebSocket 消息
+
+    只有一条结果时使用与 encode_ai_detection_message 相同的单条格式。
+
+    Args:
+        results: AI检测结果列表 (至少一条)
+
+    Returns:
+        bytes: 编码后的 JSON 消息
+    """
+    if len(results) == 1:
+        return _ai_message_encoder.encode(AIDetectionMessage(data=results[0]))
+    return _ai_message_encoder.encode(AIDetectionBatchMessage(batch=results))
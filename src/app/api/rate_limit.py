@@ -0,0 +1,127 @@
+"""API 限流模块
+
+本模块实现了基于令牌桶的请求限流器:
+- parse_rate: 解析 "10/minute" 形式的限流规则
+- RateLimiter: 按客户端地址限流的端点装饰器
+
+令牌数以整数 "令牌 x 周期纳秒" 为单位记录，补充和扣减都是整数运算，
+限流规则只在装饰时解析一次。
+"""
+import functools
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 限流周期 (纳秒)
+_PERIOD_NS = {
+    "second": 1_000_000_000,
+    "minute": 60 * 1_000_000_000,
+    "hour": 3600 * 1_000_000_000,
+    "day": 86400 * 1_000_000_000,
+}
+
+# 单个端点最多跟踪的客户端数量，超过后清理已回满的令牌桶；
+# 清理后剩余的桶仍较多时，下次清理的阈值提高到剩余数量的两倍，清理开销按请求摊还
+MAX_TRACKED_CLIENTS = 4096
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """解析限流规则
+
+    Args:
+        rate: 限流规则，如 "10/minute"
+
+    Returns:
+        Tuple[int, int]: (周期内允许的请求数, 周期纳秒数)
+
+    Raises:
+        ValueError: 规则格式无效
+    """
+    try:
+        count_str, period = rate.strip().split("/")
+        count = int(count_str)
+        period_ns = _PERIOD_NS[period.strip().lower().rstrip("s")]
+    except (ValueError, KeyError) as e:
+        raise ValueError(f"无效的限流规则: {rate!r}") from e
+    if count <= 0:
+        raise ValueError(f"无效的限流规则: {rate!r}")
+    return count, period_ns
+
+
+def get_remote_address(request: Optional[Request]) -> str:
+    """获取客户端地址作为限流键"""
+    if request is None or request.client is None:
+        return "127.0.0.1"
+    return request.client.host
+
+
+class RateLimiter:
+    """令牌桶限流器
+
+    每个被装饰的端点拥有独立的令牌桶表，按客户端地址计数。
+    超出限制时抛出 429 HTTPException，由统一的异常处理器返回错误响应。
+    """
+
+    def __init__(self, key_func: Callable[[Optional[Request]], str] = get_remote_address):
+        """初始化限流器
+
+        Args:
+            key_func: 从请求中提取限流键的函数
+        """
+        self._key_func = key_func
+
+    def limit(self, rate: str) -> Callable[[F], F]:
+        """创建限流装饰器
+
+        被装饰的端点必须声明 `request: Request` 参数。
+
+        Args:
+            rate: 限流规则，如 "10/minute"
+
+        Returns:
+            Callable: 端点装饰器
+        """
+        count, period_ns = parse_rate(rate)
+        # 令牌以 "令牌 x 周期纳秒" 为单位: 每个请求消耗 period_ns，
+        # 每经过 1 纳秒补充 count，桶容量为 count 个令牌
+        capacity = count * period_ns
+        buckets: Dict[str, Tuple[int, int]] = {}
+        key_func = self._key_func
+        prune_threshold = MAX_TRACKED_CLIENTS
+
+        def decorator(func: F) -> F:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                nonlocal prune_threshold
+                key = key_func(kwargs.get("request"))
+                now = time.monotonic_ns()
+                tokens, last = buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - last) * count)
+                if tokens < period_ns:
+                    buckets[key] = (tokens, now)
+                    raise HTTPException(
+                        status_code=429, detail=f"请求过于频繁，限制为 {rate}")
+                buckets[key] = (tokens - period_ns, now)
+                if len(buckets) > prune_threshold:
+                    _prune(buckets, now, count, capacity)
+                    # 未回满的桶无法移除，不提高阈值的话之后每个请求都会重新扫描整张表
+                    prune_threshold = max(MAX_TRACKED_CLIENTS, 2 * len(buckets))
+                return await func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+
+def _prune(buckets: Dict[str, Tuple[int, int]], now: int, count: int, capacity: int) -> None:
+    """移除已回满的令牌桶 (与新客户端等价，无需保留)"""
+    full = [
+        key for key, (tokens, last) in buckets.items()
+        if tokens + (now - last) * count >= capacity
+    ]
+    for key in full:
+        del buckets[key]
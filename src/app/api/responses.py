@@ -0,0 +1,38 @@
+"""API 响应类模块
+
+本模块定义了API层使用的自定义响应类:
+- ORJSONResponse: 基于 orjson 的 JSON 响应
+- ModelJSONResponse: 直接序列化 Pydantic 模型的 JSON 响应
+"""
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class ORJSONResponse(Response):
+    """基于 orjson 的 JSON 响应类
+
+    orjson 在 C 层完成序列化，原生支持 datetime、Enum、numpy 数组
+    以及非字符串键的字典。
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+class ModelJSONResponse(Response):
+    """直接输出 Pydantic 模型的 JSON 响应类
+
+    由 pydantic-core 一次性完成序列化，跳过 FastAPI 的
+    jsonable_encoder 与响应模型的二次校验。
+    """
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.model_dump_json().encode("utf-8")
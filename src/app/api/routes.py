@@ -10,75 +10,104 @@
 
 包含了请求限流、CORS支持、错误处理等功能。
 """
-from typing import Any, Dict, List, Optional, Callable, Coroutine
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import asyncio
 import time
-import uuid
 from datetime import datetime
+from secrets import token_hex
+
+import orjson
 
 from fastapi import APIRouter, Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
-from fastapi.encoders import jsonable_encoder
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.api.models import (
     StatusResponse, SnapshotResponse, VideoListResponse,
     HealthResponse, ErrorResponse, HealthStatus, ServerStatus,
     ServerState, VideoInfo, AIDetectionResult, DetectionObject
 )
-from app.rtsp.server import RtspServer
-from app.services.video_service import VideoService
-from app.services.websocket_manager import manager as websocket_manager
+from app.api.rate_limit import RateLimiter
+from app.api.responses import ModelJSONResponse, ORJSONResponse
 from app.core.logger import get_logger
-from app.core.config import get_settings, Settings
+
+# RTSP/视频/WebSocket 服务依赖 GStreamer、OpenCV 等重量级模块，
+# 仅在实际使用时导入，以缩短 app.api.routes 的导入时间
+if TYPE_CHECKING:
+    from app.rtsp.server import RtspServer
+    from app.services.video_service import VideoService
 
 # 创建路由器
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = get_logger(__name__)
-settings: Settings = get_settings()
 
 # 创建限流器
-limiter = Limiter(key_func=get_remote_address)
+limiter = RateLimiter()
 
 # 安全头中间件
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """安全头中间件，添加基本的安全响应头"""
+class SecurityHeadersMiddleware:
+    """安全头中间件，添加基本的安全响应头
+
+    纯 ASGI 实现，只在 http.response.start 消息中追加响应头，
+    不像 BaseHTTPMiddleware 那样为每个请求创建任务组并转发响应体。
+    """
+
+    __slots__ = ("app",)
+
+    # 预编码的安全响应头 (小写名称, latin-1 字节)，直接追加到原始响应头列表
+    _RAW_HEADERS = [
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in (
+            ("x-content-type-options", "nosniff"),
+            ("x-frame-options", "DENY"),
+            ("x-xss-protection", "1; mode=block"),
+            ("strict-transport-security", "max-age=31536000; includeSubDomains"),
+        )
+    ]
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()), *self._RAW_HEADERS]
+            await send(message)
 
-    async def dispatch(self, request: Request, call_next: Any) -> Response:
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        return response
+        await self.app(scope, receive, send_with_headers)
 
 
 # 服务管理器
 class ServiceManager:
     """服务管理器，负责管理全局服务实例"""
 
+    __slots__ = ("_rtsp_server", "_video_service")
+
     def __init__(self):
         """初始化服务管理器"""
-        self._rtsp_server: Optional[RtspServer] = None
-        self._video_service: Optional[VideoService] = None
+        self._rtsp_server: Optional["RtspServer"] = None
+        self._video_service: Optional["VideoService"] = None
 
     @property
-    def rtsp_server(self) -> RtspServer:
+    def rtsp_server(self) -> "RtspServer":
         """获取RTSP服务器实例"""
         if not self._rtsp_server:
             raise HTTPException(status_code=503, detail="RTSP服务尚未初始化")
         return self._rtsp_server
 
     @property
-    def video_service(self) -> VideoService:
+    def video_service(self) -> "VideoService":
         """获取视频服务实例"""
         if not self._video_service:
             raise HTTPException(status_code=503, detail="视频服务尚未初始化")
@@ -86,6 +115,9 @@ class ServiceManager:
 
     async def initialize(self) -> None:
         """初始化服务"""
+        from app.rtsp.server import RtspServer
+        from app.services.video_service import VideoService
+
         self._rtsp_server = RtspServer()
         self._video_service = VideoService()
         await self._video_service.start()
@@ -118,12 +150,12 @@ service_manager = ServiceManager()
 
 
 # 依赖注入函数
-def get_rtsp_server() -> RtspServer:
+def get_rtsp_server() -> "RtspServer":
     """获取RTSP服务器实例"""
     return service_manager.rtsp_server
 
 
-def get_video_service() -> VideoService:
+def get_video_service() -> "VideoService":
     """获取视频服务实例"""
     return service_manager.video_service
 
@@ -132,15 +164,21 @@ def get_video_service() -> VideoService:
 async def http_exception_handler(
     request: Request,
     exc: HTTPException,
-) -> JSONResponse:
-    """处理 HTTP 异常"""
-    error_response = ErrorResponse(
-        error=str(exc.detail),
-        code=exc.status_code,
-    )
-    return JSONResponse(
+) -> Response:
+    """处理 HTTP 异常
+
+    响应体与 ErrorResponse 结构一致，直接按字节模板拼接，
+    不构造模型也不经过通用编码器。
+    """
+    body = b"".join((
+        b'{"error":', orjson.dumps(str(exc.detail)),
+        b',"code":', str(exc.status_code).encode(),
+        b',"timestamp":"', datetime.now().isoformat().encode(), b'"}',
+    ))
+    return Response(
+        content=body,
         status_code=exc.status_code,
-        content=jsonable_encoder(error_response)
+        media_type="application/json",
     )
 
 
@@ -158,26 +196,26 @@ async def shutdown_event() -> None:
 # 路由实现
 @router.get(
     "/status",
-    response_model=StatusResponse,
     description="获取服务器状态",
-    responses={500: {"model": ErrorResponse}},
+    responses={200: {"model": StatusResponse}, 500: {"model": ErrorResponse}},
 )
 @limiter.limit("10/minute")
 async def get_status(
     request: Request,
-    rtsp_server: RtspServer = Depends(get_rtsp_server)
-) -> StatusResponse:
+    rtsp_server: "RtspServer" = Depends(get_rtsp_server)
+) -> ModelJSONResponse:
     """获取服务器状态"""
+    now = datetime.now()
     try:
-        # 获取系统状态
-        status = ServerStatus(
+        # 获取系统状态 (内部数据类型可信，跳过校验)
+        status = ServerStatus.model_construct(
             state=ServerState.RUNNING if rtsp_server.is_running else ServerState.STOPPED,
             uptime=0.0,  # TODO: 从监控服务获取
             connections=rtsp_server.get_client_count(),
             cpu_usage=0.0,  # TODO: 从系统监控获取
             memory_usage=0.0  # TODO: 从系统监控获取
         )
-        return StatusResponse(status=status)
+        return ModelJSONResponse(StatusResponse.model_construct(status=status, timestamp=now))
     except Exception as e:
         logger.error(f"获取服务器状态失败: {str(e)}")
         raise HTTPException(status_code=500, detail="服务器内部错误")
@@ -192,7 +230,7 @@ async def get_status(
 @limiter.limit("30/minute")
 async def get_snapshot(
     request: Request,
-    video_service: VideoService = Depends(get_video_service)
+    video_service: "VideoService" = Depends(get_video_service)
 ) -> SnapshotResponse:
     """获取当前视频帧"""
     try:
@@ -205,28 +243,27 @@ async def get_snapshot(
 
 @router.get(
     "/videos",
-    response_model=VideoListResponse,
     description="获取视频列表",
-    responses={500: {"model": ErrorResponse}},
+    responses={200: {"model": VideoListResponse}, 500: {"model": ErrorResponse}},
 )
 @limiter.limit("20/minute")
 async def list_videos(
     request: Request,
     page: int = 1,
     page_size: int = 10,
-    video_service: VideoService = Depends(get_video_service)
-) -> VideoListResponse:
+    video_service: "VideoService" = Depends(get_video_service)
+) -> ModelJSONResponse:
     """获取视频列表"""
     try:
         # TODO: 实现从VideoService获取视频列表
         videos: List[VideoInfo] = []
         total = 0
-        return VideoListResponse(
+        return ModelJSONResponse(VideoListResponse.model_construct(
             videos=videos,
             total=total,
             page=page,
             page_size=page_size
-        )
+        ))
     except Exception as e:
         logger.error(f"获取视频列表失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取视频列表失败")
@@ -244,7 +281,7 @@ async def list_videos(
 async def get_video(
     request: Request,
     filename: str,
-    video_service: VideoService = Depends(get_video_service)
+    video_service: "VideoService" = Depends(get_video_service)
 ) -> StreamingResponse:
     """获取指定视频文件"""
     try:
@@ -257,19 +294,33 @@ async def get_video(
         raise HTTPException(status_code=500, detail="获取视频文件失败")
 
 
+# 健康检查结果缓存: (生成时间 monotonic 秒, 已编码的 JSON 响应体)
+HEALTH_CACHE_TTL = 1.0  # 秒
+_health_cache: Tuple[float, bytes] = (float("-inf"), b"")
+
+
 @router.get(
     "/health",
-    response_model=HealthResponse,
     description="健康检查端点",
-    responses={500: {"model": ErrorResponse}},
+    responses={200: {"model": HealthResponse}, 500: {"model": ErrorResponse}},
 )
 @limiter.limit("60/minute")
 async def health_check(
     request: Request,
-    rtsp_server: RtspServer = Depends(get_rtsp_server),
-    video_service: VideoService = Depends(get_video_service)
-) -> HealthResponse:
-    """系统健康检查"""
+    rtsp_server: "RtspServer" = Depends(get_rtsp_server),
+    video_service: "VideoService" = Depends(get_video_service)
+) -> Response:
+    """系统健康检查
+
+    结果在 HEALTH_CACHE_TTL 内复用，避免负载均衡器高频探测时重复计算。
+    刷新过程中没有 await，不会有并发请求同时刷新缓存。
+    """
+    global _health_cache
+    cached_at, body = _health_cache
+    now_monotonic = time.monotonic()
+    if now_monotonic - cached_at < HEALTH_CACHE_TTL:
+        return Response(content=body, media_type="application/json")
+
     try:
         # 获取服务健康状态
         vs_status = video_service.get_health_status()
@@ -283,18 +334,22 @@ async def health_check(
         else:
             status = HealthStatus.DEGRADED
 
-        return HealthResponse(
+        body = HealthResponse.model_construct(
             status=status,
             version="1.0.0",  # TODO: 从配置获取版本号
+            timestamp=datetime.now(),
             details={
                 "rtsp_server": "healthy" if rs_status else "unhealthy",
                 "video_service": vs_status
             }
-        )
+        ).model_dump_json().encode("utf-8")
     except Exception as e:
         logger.error(f"健康检查失败: {str(e)}")
         raise HTTPException(status_code=500, detail="健康检查失败")
 
+    _health_cache = (now_monotonic, body)
+    return Response(content=body, media_type="application/json")
+
 
 # 配置CORS
 def setup_cors(app: FastAPI) -> None:
@@ -316,7 +371,14 @@ def setup_cors(app: FastAPI) -> None:
 
 # 配置应用
 def setup_app(app: FastAPI) -> None:
-    """配置FastAPI应用"""
+    """配置FastAPI应用
+
+    重复调用时直接返回，避免中间件和路由被重复注册。
+    """
+    if getattr(app.state, "api_configured", False):
+        return
+    app.state.api_configured = True
+
     # 添加异常处理器
     app.exception_handler(HTTPException)(http_exception_handler)
 
@@ -324,13 +386,41 @@ def setup_app(app: FastAPI) -> None:
     setup_cors(app)
 
     # 包含路由器
-    app.include_router(router, prefix="/api/v1")
+    app.include_router(
+        router, prefix="/api/v1", default_response_class=ORJSONResponse)
 
     # 注册启动和关闭事件
     app.add_event_handler("startup", startup_event)
     app.add_event_handler("shutdown", shutdown_event)
 
 
+# WebSocket 消息合并: 首条消息到达后，在此时间窗口内继续接收的消息合并处理
+WS_BATCH_WINDOW = 0.001  # 秒
+WS_BATCH_MAX_MESSAGES = 64
+
+
+async def _receive_text_batch(websocket: WebSocket) -> List[str]:
+    """接收一批连续到达的文本消息
+
+    阻塞等待第一条消息，随后在 WS_BATCH_WINDOW 内继续收取已排队的消息，
+    使突发消息只触发一次处理和发送。
+
+    Args:
+        websocket: WebSocket连接对象
+
+    Returns:
+        List[str]: 至少包含一条消息的列表
+    """
+    messages = [await websocket.receive_text()]
+    while len(messages) < WS_BATCH_MAX_MESSAGES:
+        try:
+            messages.append(await asyncio.wait_for(
+                websocket.receive_text(), WS_BATCH_WINDOW))
+        except asyncio.TimeoutError:
+            break
+    return messages
+
+
 # WebSocket路由
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -339,8 +429,10 @@ async def websocket_endpoint(websocket: WebSocket):
 
     客户端可以通过该端点接收实时AI检测结果
     """
+    from app.services.websocket_manager import manager as websocket_manager
+
     # 生成唯一客户端ID
-    client_id = str(uuid.uuid4())
+    client_id = token_hex(16)
 
     try:
         # 接受WebSocket连接
@@ -350,13 +442,15 @@ async def websocket_endpoint(websocket: WebSocket):
         # 持续接收消息，以保持连接活跃
         while True:
             try:
-                data = await websocket.receive_text()
+                messages = await _receive_text_batch(websocket)
                 # 可以处理来自客户端的消息
-                # 这里简单地回显收到的消息
+                # 这里简单地回显收到的消息，连续到达的多条消息合并为一次回显
+                if len(messages) == 1:
+                    echo = {"type": "echo", "message": messages[0]}
+                else:
+                    echo = {"type": "echo", "messages": messages}
                 await websocket_manager.send_personal_message(
-                    {"type": "echo", "message": data},
-                    client_id
-                )
+                    orjson.dumps(echo).decode(), client_id)
             except WebSocketDisconnect:
                 logger.info(f"客户端 {client_id} 断开了WebSocket连接")
                 break
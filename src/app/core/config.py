@@ -5,8 +5,7 @@
 使用 Pydantic v2 的 Settings 类处理配置验证和环境变量加载。
 """
 
-import os
-from typing import Dict, Any, Optional
+from typing import Dict, Optional
 from pathlib import Path
 from functools import lru_cache
 from pydantic import Field
@@ -34,6 +33,10 @@ class Settings(BaseSettings):
     OUTPUT_DIR: Path = Field(default=BASE_DIR / "videos", description="视频输出目录")
     MAX_VIDEO_STORAGE_DAYS: int = Field(default=1, description="视频文件最大存储天数")
     MAX_FPS_SERVER: int = Field(default=10, description="RTSP 服务器最大帧率")
+    USE_NVCODEC: bool = Field(
+        default=False, description="推流解码使用 NVIDIA 硬件解码 (nvv4l2decoder + nvvideoconvert)")
+    USE_VAAPI: bool = Field(
+        default=False, description="推流解码使用 VA-API 硬件解码 (vaapih264dec + vaapipostproc)")
 
     # Roboflow AI 配置
     ROBOFLOW_API_KEY: str = Field(description="Roboflow API Key")
@@ -61,22 +64,22 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=True,
-        extra="ignore"
+        extra="ignore",
+        frozen=True
     )
 
-    def __init__(self, **data: Any):
-        super().__init__(**data)
-        # 确保输出目录存在
-        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
-
 
 @lru_cache()
 def get_settings() -> Settings:
     """获取应用程序设置的单例实例
 
-    使用 lru_cache 装饰器确保只创建一个 Settings 实例
+    使用 lru_cache 装饰器确保只创建一个 Settings 实例，
+    并在首次创建时确保输出目录存在
 
     Returns:
         Settings: 应用程序设置实例
     """
-    return Settings()
+    settings = Settings()
+    if not settings.OUTPUT_DIR.exists():
+        settings.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    return settings
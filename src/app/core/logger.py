@@ -9,7 +9,7 @@ import sys
 import logging
 from pathlib import Path
 from logging.handlers import RotatingFileHandler
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from .config import get_settings
 
@@ -39,6 +39,64 @@ LOG_LEVELS = {
     "CRITICAL": logging.CRITICAL,
 }
 
+# 需要调用栈信息 (sys._getframe) 的日志格式字段
+_SOURCE_FIELDS = ("%(pathname)", "%(filename)", "%(module)", "%(lineno)", "%(funcName)")
+
+
+def _installed_formats() -> List[str]:
+    """收集进程中已安装的日志处理程序的格式，以及 uvicorn 默认日志配置的格式
+
+    uvicorn 在加载应用之前已按其日志配置安装了处理程序，
+    使用 --log-config 或之后才安装的处理程序也可能用到调用栈字段。
+    """
+    formats: List[str] = []
+    loggers = [logging.getLogger()] + [
+        item for item in logging.Logger.manager.loggerDict.values()
+        if isinstance(item, logging.Logger)
+    ]
+    for item in loggers:
+        for handler in item.handlers:
+            fmt = getattr(handler.formatter, "_fmt", None)
+            if fmt:
+                formats.append(fmt)
+    try:
+        from uvicorn.config import LOGGING_CONFIG
+    except ImportError:
+        return formats
+    for formatter in LOGGING_CONFIG.get("formatters", {}).values():
+        fmt = formatter.get("fmt") or formatter.get("format")
+        if fmt:
+            formats.append(fmt)
+    return formats
+
+
+def _disable_unused_record_fields(*formats: str) -> None:
+    """关闭日志格式中未使用的 LogRecord 字段采集
+
+    logging 默认为每条日志记录采集线程、进程、asyncio 任务和调用栈信息，
+    其中调用栈查找 (sys._getframe) 开销最大。格式中用不到的字段无需采集。
+
+    注意: 这些开关是 logging 模块的全局设置，对整个进程生效。
+    除传入的格式外，还会检查已安装的处理程序 (包括 uvicorn 的) 和 uvicorn 默认配置的格式，
+    任一格式用到的字段都保持采集；但此后才安装、且用到已关闭字段的处理程序
+    将得到空的 %(lineno)d、%(funcName)s、%(pathname)s 等字段。
+    loguru 自行查找调用栈，不受影响。
+
+    Args:
+        formats: 当前启用的所有日志格式字符串
+    """
+    fmt = "".join(formats) + "".join(_installed_formats())
+    if "%(thread" not in fmt:
+        logging.logThreads = False
+    if "%(process)" not in fmt:
+        logging.logProcesses = False
+    if "%(processName)" not in fmt:
+        logging.logMultiprocessing = False
+    if "%(taskName)" not in fmt:
+        logging.logAsyncioTasks = False
+    if not any(field in fmt for field in _SOURCE_FIELDS):
+        logging._srcfile = None  # type: ignore[attr-defined]
+
 
 def setup_logging(log_file: Optional[Path] = None) -> logging.Logger:
     """设置应用程序日志系统
@@ -56,6 +114,8 @@ def setup_logging(log_file: Optional[Path] = None) -> logging.Logger:
 
     # 获取日志级别
     log_level = LOG_LEVELS.get(settings.LOG_LEVEL.upper(), logging.INFO)
+    console_format = settings.CONSOLE_LOG_FORMAT
+    file_format = settings.LOG_FORMAT
 
     # 配置根日志记录器
     logger = logging.getLogger()
@@ -69,7 +129,7 @@ def setup_logging(log_file: Optional[Path] = None) -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     # 使用自定义格式化器添加行号
-    console_formatter = LineNumberingFormatter(settings.CONSOLE_LOG_FORMAT)
+    console_formatter = LineNumberingFormatter(console_format)
     console_handler.setFormatter(console_formatter)
     logger.addHandler(console_handler)
 
@@ -86,15 +146,21 @@ def setup_logging(log_file: Optional[Path] = None) -> logging.Logger:
             encoding="utf-8",
         )
         file_handler.setLevel(log_level)
-        file_formatter = logging.Formatter(settings.LOG_FORMAT)
+        file_formatter = logging.Formatter(file_format)
         file_handler.setFormatter(file_formatter)
         logger.addHandler(file_handler)
 
+    # 只采集格式中实际用到的字段
+    if log_file:
+        _disable_unused_record_fields(console_format, file_format)
+    else:
+        _disable_unused_record_fields(console_format)
+
     # 设置第三方库的日志级别（通常可以使其更安静）
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
-    logger.info(f"日志系统初始化完成，级别: {settings.LOG_LEVEL}")
+    logger.info("日志系统初始化完成，级别: %s", settings.LOG_LEVEL)
     return logger
 
 
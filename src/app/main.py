@@ -6,27 +6,30 @@
 '''
 
 from app.services import AIProcessor, manager as websocket_manager  # Import AIProcessor
-from app.utils.gstreamer_utils import create_and_setup_gstreamer_frame_producer
+from app.utils.frame_pool import FramePool
+from app.utils.frame_queue import FrameQueue
 from app.core.logger import setup_logging
 from app.core.config import get_settings
 from app.rtsp.server import RtspServer
-from app.api.routes import router as api_router, setup_app
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import threading
+from app.api.responses import ORJSONResponse
+from app.api.routes import setup_app
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import FastAPI, Request
+import fcntl
+import functools
 import socket
+import struct
+import time
 from datetime import datetime
 import logging
 import asyncio
-import signal
 import os
-import json  # For logging AI predictions
-from typing import Dict, Any, Optional, List  # For type hinting
-import copy  # 确保导入 copy 模块
+import numpy as np
+import orjson  # For logging AI predictions
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, Set  # For type hinting
 
 # 新增导入
-from app.api.models import AIDetectionResult, DetectionObject
+from app.api.models import AIDetectionResultMsg, DetectionObjectMsg, encode_ai_detection_batch
 
 # 设置环境变量，避免matplotlib错误
 os.environ['MPLBACKEND'] = 'Agg'  # 使用非交互式后端
@@ -38,12 +41,11 @@ if 'GST_DEBUG' not in os.environ:
 # 打印当前的GStreamer调试设置
 print(f"当前GStreamer调试级别: {os.environ.get('GST_DEBUG', '未设置')}")
 
-# 导入 GStreamer (确保来自系统安装)
+# 检查 GStreamer 是否可用 (确保来自系统安装)，require_version 在缺少对应 typelib 时抛出 ValueError
 try:
     import gi
     gi.require_version('Gst', '1.0')
     gi.require_version('GstRtspServer', '1.0')
-    from gi.repository import GLib, Gst, GstRtspServer  # type: ignore
 except (ImportError, ValueError) as e:
     raise ImportError(
         f"无法加载 GStreamer 或 GstRtspServer: {e}. "
@@ -54,43 +56,84 @@ except (ImportError, ValueError) as e:
 # 配置日志
 logger = setup_logging()
 
-# 初始化 GStreamer
-Gst.init(None)
-
 # 导入设置
 settings = get_settings()
 
-# GLib 主循环
-mainloop = GLib.MainLoop()
+# ioctl 请求码: 获取网卡 IPv4 地址 (linux/sockios.h)
+SIOCGIFADDR = 0x8915
 
 # 全局变量
-rtsp_thread = None
 periodic_task = None
 rtsp_server: Optional[RtspServer] = None  # Add type hint
 ai_processor: Optional[AIProcessor] = None
-FF: Optional[asyncio.Task] = None
+ai_processor_task: Optional[asyncio.Task] = None
+broadcast_task: Optional[asyncio.Task] = None
+# 应用关闭事件，用于通知后台任务退出
+stop_event: Optional[asyncio.Event] = None
+# 持有所有后台任务的强引用，事件循环只保存任务的弱引用
+BACKGROUND_TASKS: Set[asyncio.Task] = set()
+_first_prediction_logged = False  # 首次收到AI预测结果时记录一次日志
+# AI 预测结果汇总日志: 自上次输出以来的帧数、检测数和输出时间 (monotonic 秒)
+_summary_frames = 0
+_summary_detections = 0
+_summary_last_log = 0.0
+# AI 检测结果广播队列，由 broadcast_worker 消费
+broadcast_queue: Optional["asyncio.Queue[AIDetectionResultMsg]"] = None
+
+# AI 结果广播合并: 首条结果到达后，在此时间窗口内到达的结果合并为一条消息
+BROADCAST_BATCH_WINDOW = 0.02  # 秒
+BROADCAST_BATCH_MAX = 16
+# 广播队列容量，客户端发送跟不上时丢弃最旧的结果
+BROADCAST_QUEUE_SIZE = 32
+
+# 帧队列只保留最新一帧，AI 处理跟不上时旧帧直接被替换
+FRAME_QUEUE_SIZE = 1
+# 帧缓冲池大小: 队列中的帧 + 消费者正在拷贝的帧 + 采集线程正在写入的帧，
+# 池耗尽时丢弃新到达的帧
+FRAME_POOL_SIZE = FRAME_QUEUE_SIZE + 2
+
+# AI 预测结果汇总日志的输出间隔 (秒)
+PREDICTION_SUMMARY_INTERVAL = 1.0
+
+# 定期任务执行间隔 (秒)
+PERIODIC_TASK_INTERVAL = 86400  # 每天执行一次检查
+
+
+def create_background_task(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """创建后台任务并保存强引用，任务结束后自动移除
+
+    Args:
+        coro: 要运行的协程
+
+    Returns:
+        asyncio.Task: 创建的任务
+    """
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
+    return task
 
 
 # 获取服务器IP地址
+@functools.lru_cache(maxsize=1)
 def get_server_ip():
-    """获取服务器IP地址，优先使用eth1网卡的IP地址"""
+    """获取服务器IP地址，优先使用eth1网卡的IP地址
+
+    进程运行期间服务器IP不变，结果只计算一次。
+    """
     try:
-        # 优先获取eth1网卡的IP（WSL2的局域网IP）
-        import subprocess
-        result = subprocess.run(
-            ['ip', 'addr', 'show', 'eth1'], capture_output=True, text=True)
-        if result.returncode == 0:
-            import re
-            match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)/', result.stdout)
-            if match:
-                ip = match.group(1)
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # 优先获取eth1网卡的IP（WSL2的局域网IP），SIOCGIFADDR 直接读取网卡地址
+            try:
+                ifreq = fcntl.ioctl(s.fileno(), SIOCGIFADDR, struct.pack('256s', b'eth1'))
+                ip = socket.inet_ntoa(ifreq[20:24])
                 logger.info(f"使用 eth1 网卡IP: {ip}")
                 return ip
+            except OSError:
+                pass
 
-        # 如果上面的方法失败，尝试获取其他网络接口的IP
-        import socket
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
+            # 如果上面的方法失败，尝试获取其他网络接口的IP
             s.connect(('8.8.8.8', 80))
             ip_address = s.getsockname()[0]
             logger.info(f"使用网络接口IP: {ip_address}")
@@ -102,108 +145,118 @@ def get_server_ip():
         return '127.0.0.1'  # 使用localhost而不是0.0.0.0，因为AIProcessor需要连接到一个实际的IP
 
 
-# 启动主循环的后台任务
-def run_rtsp_server_loop():
-    try:
-        # 启动RTSP服务器
-        logger.info("启动RTSP服务器...")
-        if rtsp_server:
-            rtsp_server.start()
-            logger.info(
-                f"RTSP 服务器已启动于 rtsp://0.0.0.0:{settings.RTSP_PORT}{settings.RTSP_PATH}")
-
-            logger.info("主循环启动...")
-            mainloop.run()
-        else:
-            logger.error("RTSP服务器实例未初始化，无法启动主循环。")
-    except Exception as e:
-        logger.error(f"运行主循环失败: {e}", exc_info=True)
-    finally:
-        # 确保停止RTSP服务器
-        if (rtsp_server and rtsp_server.is_running):
-            rtsp_server.stop()
-        logger.info("主循环已退出。")
-
-
 # 定期执行的后台任务 (使用 asyncio)
-async def periodic_tasks():
+async def periodic_tasks(stop_event: asyncio.Event):
+    """每天执行一次检查，stop_event 被设置后立即退出"""
     while True:
         try:
             # TODO: 清理任务暂时移除
             logger.info("定期任务检查...")
-            await asyncio.sleep(86400)  # 每天执行一次检查
         except Exception as e:
             logger.error(f"定期任务失败: {e}", exc_info=True)
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=PERIODIC_TASK_INTERVAL)
+            return
+        except asyncio.TimeoutError:
+            pass
 
 
-# 优雅关闭处理
-async def shutdown_event():
-    logger.info("收到关闭信号，开始优雅关闭...")
-    global ai_processor, ai_processor_task  # Ensure globals are referenced
-
-    # 停止 GStreamer 主循环
-    if mainloop.is_running():
-        logger.info("正在停止主循环...")
-        mainloop.quit()
-
-    # 等待服务器线程结束 (如果需要)
-    if rtsp_thread and rtsp_thread.is_alive():
-        logger.info("等待服务器线程退出...")
-        rtsp_thread.join(timeout=5)  # 等待最多 5 秒
-        if rtsp_thread.is_alive():
-            logger.warning("服务器线程未在超时内退出。")
+# AI 检测结果广播任务
+async def broadcast_worker(queue: "asyncio.Queue[AIDetectionResultMsg]"):
+    """从队列中取出AI检测结果并广播给所有WebSocket客户端
 
-    # 停止 AI 处理器
-    if ai_processor:
-        logger.info("正在停止 AIProcessor...")
+    在 BROADCAST_BATCH_WINDOW 内连续到达的结果合并为一条消息发送，
+    每个客户端只需一次发送；AI 回调只负责入队，不等待网络发送。
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + BROADCAST_BATCH_WINDOW
+        while len(batch) < BROADCAST_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
         try:
-            await ai_processor.stop()
-            logger.info("AIProcessor 已停止。")
+            # 客户端按文本帧接收 JSON，编码结果只解码一次，所有客户端复用同一个 str
+            await websocket_manager.broadcast(encode_ai_detection_batch(batch).decode())
         except Exception as e:
-            logger.error(f"停止 AIProcessor 时出错: {e}", exc_info=True)
+            logger.error(f"广播AI检测结果失败: {e}", exc_info=True)
 
-    # 取消 AI 处理器任务
-    if ai_processor_task:
-        if not ai_processor_task.done():
-            logger.info("正在取消 AIProcessor 任务...")
-            ai_processor_task.cancel()
-            try:
-                await ai_processor_task
-            except asyncio.CancelledError:
-                logger.info("AIProcessor 任务已成功取消。")
-            except Exception as e:
-                logger.error(f"AIProcessor 任务在取消期间/之后引发异常: {e}", exc_info=True)
-        else:
-            logger.info("AIProcessor 任务已完成。")
-            if ai_processor_task.exception():
-                logger.error(
-                    f"AIProcessor 任务以异常结束: {ai_processor_task.exception()}", exc_info=ai_processor_task.exception())
 
-    # 取消定期任务
-    if periodic_task:
-        if not periodic_task.done():
-            logger.info("正在取消定期任务...")
-            periodic_task.cancel()
-            try:
-                await periodic_task
-            except asyncio.CancelledError:
-                logger.info("定期任务已成功取消。")
-            except Exception as e:
-                logger.error(f"定期任务在取消期间/之后引发异常: {e}", exc_info=True)
-        else:
-            logger.info("定期任务已完成。")
-            if periodic_task.exception():
-                logger.error(
-                    f"定期任务以异常结束: {periodic_task.exception()}", exc_info=periodic_task.exception())
+def enqueue_broadcast(result: AIDetectionResultMsg) -> None:
+    """将AI检测结果加入广播队列，队列已满时丢弃最旧的结果
+
+    Args:
+        result: AI检测结果
+    """
+    try:
+        broadcast_queue.put_nowait(result)
+    except asyncio.QueueFull:
+        broadcast_queue.get_nowait()
+        broadcast_queue.put_nowait(result)
+        logger.warning("广播队列已满，丢弃最旧的AI检测结果")
+
+
+async def _cancel_and_wait(task: Optional[asyncio.Task], name: str, grace: float = 0) -> None:
+    """取消后台任务并等待其结束
+
+    Args:
+        task: 要取消的任务 (None 时直接返回)
+        name: 任务名称，用于日志
+        grace: 取消前等待任务自行结束的时间(秒)
+    """
+    if task is None:
+        return
+    if grace and not task.done():
+        await asyncio.wait({task}, timeout=grace)
+    if task.done():
+        logger.info(f"{name}已完成。")
+        if not task.cancelled() and task.exception():
+            logger.error(f"{name}以异常结束: {task.exception()}", exc_info=task.exception())
+        return
+
+    logger.info(f"正在取消{name}...")
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info(f"{name}已成功取消。")
+    except Exception as e:
+        logger.error(f"{name}在取消期间/之后引发异常: {e}", exc_info=True)
+
+
+def _log_prediction_summary(frame_id: int, detection_count: int) -> None:
+    """累计AI预测结果，每 PREDICTION_SUMMARY_INTERVAL 秒输出一条 INFO 汇总日志
 
-    logger.info("优雅关闭完成。")
+    Args:
+        frame_id: 当前帧ID
+        detection_count: 当前帧的检测对象数量
+    """
+    global _summary_frames, _summary_detections, _summary_last_log
+    _summary_frames += 1
+    _summary_detections += detection_count
+    now = time.monotonic()
+    if now - _summary_last_log < PREDICTION_SUMMARY_INTERVAL:
+        return
+    logger.info(
+        "主回调 handle_ai_prediction: 最近 %.1f 秒处理 %d 帧 (最新 Frame ID: %s)，共 %d 个检测对象",
+        now - _summary_last_log if _summary_last_log else 0.0,
+        _summary_frames, frame_id, _summary_detections,
+    )
+    _summary_frames = 0
+    _summary_detections = 0
+    _summary_last_log = now
 
 
 # 定义 AI 预测处理函数
 async def handle_ai_prediction(predictions_data: Dict[str, Any], frame_info: Dict[str, Any]):
     """
     处理 AIProcessor 预测结果的回调函数。
-    将AI检测结果转换为 AIDetectionResult 模型并通过WebSocket发送给所有连接的客户端。
+    将AI检测结果转换为 AIDetectionResultMsg 结构并通过WebSocket发送给所有连接的客户端。
     """
     processed_frame_id_for_error = 0
     if "frame_info" in locals() and frame_info:
@@ -214,10 +267,12 @@ async def handle_ai_prediction(predictions_data: Dict[str, Any], frame_info: Dic
             processed_frame_id_for_error = 0
 
 
+    global _first_prediction_logged
     try:
-        logger.info(
-            "!!!!!!!!!! handle_ai_prediction CALLED (inside try) !!!!!!!!!!") # Keep this for now
-        
+        if not _first_prediction_logged:
+            _first_prediction_logged = True
+            logger.info("主回调 handle_ai_prediction: 首次收到AI预测结果")
+
         raw_frame_id = frame_info.get("frame_id", 0)
         frame_id: int
         if isinstance(raw_frame_id, str) and raw_frame_id.isdigit():
@@ -237,37 +292,36 @@ async def handle_ai_prediction(predictions_data: Dict[str, Any], frame_info: Dic
         else:
             # Fallback if timestamp is not a datetime object as expected
             logger.warning(f"Invalid timestamp format in frame_info: {raw_timestamp}. Type: {type(raw_timestamp)}. Using current time as fallback.")
-            timestamp_ms = int(datetime.now().timestamp() * 1000)
+            timestamp_ms = int(time.time() * 1000)
 
 
-        logger.info(
-            f"主回调 handle_ai_prediction: 收到AI预测结果 (Frame ID: {frame_id}, Original Timestamp Obj: {raw_timestamp}), "
-            f"Predictions: {'[没有预测结果]' if not predictions_data or not predictions_data.get('predictions') else '有预测结果'}"
+        # 逐帧日志只在 DEBUG 级别输出，INFO 级别由 _log_prediction_summary 定期汇总
+        logger.debug(
+            "主回调 handle_ai_prediction: 收到AI预测结果 (Frame ID: %s, Original Timestamp Obj: %s), Predictions: %s",
+            frame_id, raw_timestamp,
+            '有预测结果' if predictions_data and predictions_data.get('predictions') else '[没有预测结果]',
         )
         
-        # Log raw data details (original logging block)
-        try:
-            predictions_data_log = copy.deepcopy(predictions_data)
-            frame_info_log = copy.deepcopy(frame_info)
-
-            if isinstance(frame_info_log.get("timestamp"), datetime):
-                frame_info_log["timestamp"] = frame_info_log["timestamp"].isoformat()
-
-            logger.info(f"  Raw Frame Info: {frame_info_log}")
-            logger.info(
-                f"  Raw Predictions Data Type: {type(predictions_data_log)}")
-
+        # 详细的原始数据日志只在 DEBUG 级别输出，避免每帧复制和序列化预测结果
+        if logger.isEnabledFor(logging.DEBUG):
             try:
-                logger.info(f"  Detailed Predictions Data (JSON): {json.dumps(predictions_data_log, indent=2, default=str)}")
-            except Exception as e_json_dump_main:
-                logger.error(f"主回调 handle_ai_prediction: 记录 predictions_data_log 时出错 (JSON dump): {e_json_dump_main}. Raw data: {predictions_data_log}")
-
-        except Exception as log_e:
-            logger.error(
-                f"主回调 handle_ai_prediction: 记录predictions_data或frame_info时出错: {log_e}")
-
+                frame_info_log = {
+                    **frame_info,
+                    "timestamp": raw_timestamp.isoformat() if isinstance(raw_timestamp, datetime) else raw_timestamp,
+                }
+                logger.debug("  Raw Frame Info: %s", frame_info_log)
+                logger.debug(
+                    "  Detailed Predictions Data (JSON): %s",
+                    orjson.dumps(
+                        predictions_data,
+                        default=str,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+                    ).decode())
+            except Exception as log_e:
+                logger.error(
+                    f"主回调 handle_ai_prediction: 记录predictions_data或frame_info时出错: {log_e}")
 
-        processed_detections: List[DetectionObject] = []
+        processed_detections: List[DetectionObjectMsg] = []
         raw_predictions = predictions_data.get("predictions", [])
         
         image_shape = frame_info.get("image_shape") # Tuple (height, width, channels)
@@ -276,40 +330,43 @@ async def handle_ai_prediction(predictions_data: Dict[str, Any], frame_info: Dic
             img_height, img_width = image_shape[0], image_shape[1]
 
             if img_width > 0 and img_height > 0:
+                # Roboflow 返回中心点 x,y 以及宽度和高度 (像素)，类别字段为 'class'
+                # 预先分配列表并按下标写入，逐条转换为数值，跳过缺少核心字段或无法转换的预测
+                boxes_abs: List[Any] = [None] * len(raw_predictions)
+                labels: List[Any] = [None] * len(raw_predictions)
+                n_valid = 0
                 for pred in raw_predictions:
                     try:
-                        # Roboflow 通常返回中心点x,y以及宽度和高度
-                        # 直接使用这些值，并确保它们是浮点数
-                        x_center_abs_raw = pred.get('x')
-                        y_center_abs_raw = pred.get('y')
-                        obj_width_abs_raw = pred.get('width')
-                        obj_height_abs_raw = pred.get('height')
-                        confidence_raw = pred.get('confidence')
-                        # Roboflow 返回 'class' 而不是 'class_name'
-                        class_name_raw = pred.get('class') 
-
-                        if None in [x_center_abs_raw, y_center_abs_raw, obj_width_abs_raw, obj_height_abs_raw, confidence_raw, class_name_raw]:
-                            logger.warning(f"Skipping prediction due to missing core fields (x,y,width,height,confidence,class): {pred}")
-                            continue
-
-                        x_center_abs = float(x_center_abs_raw)
-                        y_center_abs = float(y_center_abs_raw)
-                        obj_width_abs = float(obj_width_abs_raw)
-                        obj_height_abs = float(obj_height_abs_raw)
-                        
-                        detection_obj = DetectionObject(
-                            class_name=str(class_name_raw),
-                            confidence=float(confidence_raw),
-                            x_center=x_center_abs / img_width,
-                            y_center=y_center_abs / img_height,
-                            width=obj_width_abs / img_width,
-                            height=obj_height_abs / img_height,
-                        )
-                        processed_detections.append(detection_obj)
+                        box = (pred['x'], pred['y'], pred['width'], pred['height'])
+                        label = (pred['class'], pred['confidence'])
+                    except KeyError:
+                        box = label = (None,)
+                    if None in box or None in label:
+                        logger.warning(f"Skipping prediction due to missing core fields (x,y,width,height,confidence,class): {pred}")
+                        continue
+                    try:
+                        boxes_abs[n_valid] = (float(box[0]), float(box[1]), float(box[2]), float(box[3]))
+                        labels[n_valid] = (str(label[0]), float(label[1]))
                     except (ValueError, TypeError) as e_obj_conversion:
                         logger.error(f"Error converting prediction data to float/str: {pred}. Error: {e_obj_conversion}", exc_info=True)
-                    except Exception as e_obj_generic:
-                        logger.error(f"Error processing individual prediction object: {pred}. Error: {e_obj_generic}", exc_info=True)
+                        continue
+                    n_valid += 1
+                del boxes_abs[n_valid:], labels[n_valid:]
+
+                # 一次性将所有检测框归一化为相对坐标 (此时只包含已转换的浮点数)
+                boxes = np.array(boxes_abs, dtype=np.float64).reshape(-1, 4)
+                boxes /= np.array((img_width, img_height, img_width, img_height), dtype=np.float64)
+                processed_detections = [
+                    DetectionObjectMsg(
+                        class_name=class_name,
+                        confidence=confidence,
+                        x_center=x_center,
+                        y_center=y_center,
+                        width=width,
+                        height=height,
+                    )
+                    for (class_name, confidence), (x_center, y_center, width, height) in zip(labels, boxes.tolist())
+                ]
             else:
                 logger.warning(f"Image width or height is zero ({img_width}x{img_height}). Cannot calculate relative coordinates.")
         else:
@@ -320,82 +377,99 @@ async def handle_ai_prediction(predictions_data: Dict[str, Any], frame_info: Dic
         # 例如，通过 frame_info 字典传递 self.fps_counter.get_fps() 的结果。
         current_fps = frame_info.get("fps", 0.0) # Attempt to get from frame_info, fallback to 0.0
 
-        ai_result_payload = AIDetectionResult(
+        ai_result_payload = AIDetectionResultMsg(
             frame_id=frame_id,
             timestamp=timestamp_ms,
             fps=float(current_fps), 
             detections=processed_detections,
-            error=None 
         )
         
-        await websocket_manager.broadcast_ai_result(ai_result_payload.model_dump(exclude_none=True))
-        logger.debug(f"主回调 handle_ai_prediction: 已广播 Frame ID {frame_id} 的AI结果 (AIDetectionResult model).")
+        enqueue_broadcast(ai_result_payload)
+        _log_prediction_summary(frame_id, len(processed_detections))
+        logger.debug("主回调 handle_ai_prediction: Frame ID %s 的AI结果已加入广播队列.", frame_id)
 
     except Exception as e:
         logger.error(
             f"主回调 handle_ai_prediction 处理AI预测结果错误: {e}", exc_info=True)
         try:
             # Ensure timestamp_ms for error payload is defined
-            error_timestamp_ms = int(datetime.now().timestamp() * 1000)
             if 'timestamp_ms' in locals() and isinstance(timestamp_ms, int): # Use specific if available
-                 error_timestamp_ms = timestamp_ms
+                error_timestamp_ms = timestamp_ms
+            else:
+                error_timestamp_ms = int(time.time() * 1000)
             
-            error_payload = AIDetectionResult(
+            error_payload = AIDetectionResultMsg(
                 frame_id=processed_frame_id_for_error,
                 timestamp=error_timestamp_ms,
                 fps=0.0, # FPS likely unknown or irrelevant in error case
                 detections=[],
                 error=str(e)
             )
-            await websocket_manager.broadcast_ai_result(error_payload.model_dump(exclude_none=True))
-            logger.info(f"主回调 handle_ai_prediction: 已广播错误报告 Frame ID {processed_frame_id_for_error}.")
+            enqueue_broadcast(error_payload)
+            logger.info(f"主回调 handle_ai_prediction: 错误报告 Frame ID {processed_frame_id_for_error} 已加入广播队列.")
         except Exception as e_report:
             logger.error(f"主回调 handle_ai_prediction: 广播错误报告失败: {e_report}")
 
 
 @asynccontextmanager
-async def lifespan(app: FastAPI):
-    """FASTAPI APP 应用生命周期管理"""
-    global rtsp_thread, periodic_task, rtsp_server, ai_processor, ai_processor_task
-    # 启动
-    logger.info("FASTAPI 应用启动，正在初始化...")
-    os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+async def rtsp_lifespan(frame_queue: FrameQueue, frame_pool: FramePool) -> AsyncIterator[RtspServer]:
+    """RTSP 服务器生命周期: 服务器在自己的主上下文线程中运行主循环，退出时停止服务器"""
+    global rtsp_server
 
-    # 初始化 RTSP 服务器实例
     logger.info("初始化 RTSPServer...")
     rtsp_server = RtspServer()  # Corrected: No arguments passed to constructor
     logger.info("RTSPServer 实例已创建.")
-
-    # --- 提前初始化帧队列 ---
-    import queue
     # 这个 frame_queue 实例将被 RtspServer 和 GStreamerFrameProducer 共享
-    shared_frame_queue = queue.Queue(maxsize=60)  # 限制队列大小
-    rtsp_server.frame_queue = shared_frame_queue  # 在服务器启动前设置队列
-    logger.info("为RTSP服务器创建并设置了帧队列 (早期初始化)")
-    # --- 帧队列初始化完毕 ---
+    rtsp_server.frame_queue = frame_queue  # 在服务器启动前设置队列
+    rtsp_server.frame_pool = frame_pool
+    logger.info("为RTSP服务器设置了帧队列")
 
-    logger.info("正在启动 RTSP 服务器线程...")
-    rtsp_thread = threading.Thread(target=run_rtsp_server_loop, daemon=True)
-    rtsp_thread.start()
-    logger.info("RTSP 服务器线程已启动")
+    # AI 需要连接到 RTSP 服务器: start() 启动服务器专用的主循环线程，
+    # 并等待主循环开始分发后才返回，放到线程中执行以免阻塞事件循环
+    logger.info("启动RTSP服务器...")
+    try:
+        await asyncio.to_thread(rtsp_server.start)
+        logger.info(
+            f"RTSP 服务器已启动于 rtsp://0.0.0.0:{settings.RTSP_PORT}{settings.RTSP_PATH}")
+    except Exception as e:
+        logger.error(f"启动RTSP服务器失败: {e}", exc_info=True)
+
+    try:
+        yield rtsp_server
+    finally:
+        # 退出服务器主循环并等待其线程结束
+        logger.info("正在停止RTSP服务器...")
+        await asyncio.to_thread(rtsp_server.stop)
+
+
+@asynccontextmanager
+async def broadcast_lifespan() -> AsyncIterator[None]:
+    """AI结果广播任务生命周期 (需在 AIProcessor 产生结果之前就绪)"""
+    global broadcast_queue, broadcast_task
+
+    broadcast_queue = asyncio.Queue(maxsize=BROADCAST_QUEUE_SIZE)
+    broadcast_task = create_background_task(broadcast_worker(broadcast_queue))
+    try:
+        yield
+    finally:
+        await _cancel_and_wait(broadcast_task, "广播任务")
 
-    # 允许 RTSP 服务器启动前 AI 连接的时间
-    logger.info("等待 RTSP 服务器完全启动...")
-    await asyncio.sleep(5)  # 延长延迟，确保RTSP服务器完全启动
 
-    # 初始化并启动 AIProcessor
-    server_ip = get_server_ip()  # 使用实际服务器IP
-    rtsp_stream_url_for_ai = f"rtsp://{server_ip}:{settings.RTSP_PORT}{settings.RTSP_PATH}"
-    logger.info(f"使用 RTSP URL 初始化 AIProcessor: {rtsp_stream_url_for_ai}")
+@asynccontextmanager
+async def ai_processor_lifespan(frame_queue: FrameQueue, frame_pool: FramePool, rtsp_url: str) -> AsyncIterator[Optional[AIProcessor]]:
+    """AIProcessor 生命周期: 初始化失败时记录错误，应用继续运行"""
+    global ai_processor, ai_processor_task
 
+    logger.info(f"使用 RTSP URL 初始化 AIProcessor: {rtsp_url}")
     try:
         # 创建GStreamerFrameProducer
         from app.services.gstreamer_frame_producer import GStreamerFrameProducer
         frame_producer = GStreamerFrameProducer(
-            frame_queue=shared_frame_queue,  # 确保使用上面创建的同一个队列实例
+            frame_queue=frame_queue,  # 确保使用 RTSP 服务器的同一个队列实例
             fps=5.0,  # 假设的帧率
             width=640,  # 默认宽度
-            height=480  # 默认高度
+            height=480,  # 默认高度
+            frame_pool=frame_pool
         )
         logger.info(f"已创建GStreamerFrameProducer，使用默认分辨率640x480，帧率10.0")
 
@@ -407,28 +481,81 @@ async def lifespan(app: FastAPI):
             frame_producer=frame_producer
         )
         logger.info("AIProcessor 实例已创建。正在启动 AI 处理任务...")
-        ai_processor_task = asyncio.create_task(ai_processor.start())
+        ai_processor_task = create_background_task(ai_processor.start())
         logger.info("AIProcessor 任务已创建并开始后台处理。")
     except Exception as e:
         logger.error(f"初始化或启动 AIProcessor 失败: {e}", exc_info=True)
         ai_processor = None
         ai_processor_task = None
 
-    # 启动定期任务
-    periodic_task = asyncio.create_task(periodic_tasks())
+    try:
+        yield ai_processor
+    finally:
+        # stop 需要在任务仍在运行时调用，之后再取消任务
+        if ai_processor:
+            logger.info("正在停止 AIProcessor...")
+            try:
+                await ai_processor.stop()
+                logger.info("AIProcessor 已停止。")
+            except Exception as e:
+                logger.error(f"停止 AIProcessor 时出错: {e}", exc_info=True)
+        await _cancel_and_wait(ai_processor_task, "AIProcessor 任务")
+
+
+@asynccontextmanager
+async def periodic_lifespan() -> AsyncIterator[None]:
+    """定期任务生命周期"""
+    global periodic_task, stop_event
+
+    stop_event = asyncio.Event()
+    periodic_task = create_background_task(periodic_tasks(stop_event))
     logger.info("定期任务已启动。")
-    logger.info("应用启动完成。")
+    try:
+        yield
+    finally:
+        # 定期任务在 stop_event 设置后会自行退出，无需取消
+        stop_event.set()
+        await _cancel_and_wait(periodic_task, "定期任务", grace=1.0)
 
-    logger.info(
-        f"RTSP 服务器地址: rtsp://{server_ip}:{settings.RTSP_PORT}{settings.RTSP_PATH}")
-    logger.info(f"FastAPI 服务器运行在: http://{server_ip}:{settings.API_PORT}")
-    logger.info("请在 Android 设备上配置 RTSP 服务器地址进行测试。")
 
-    yield  # 应用运行中
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """FASTAPI APP 应用生命周期管理
+
+    各子系统按依赖顺序启动，由 AsyncExitStack 保证按相反顺序清理，
+    启动中途失败时已启动的部分同样会被清理。
+    """
+    # 启动
+    logger.info("FASTAPI 应用启动，正在初始化...")
+
+    async with AsyncExitStack() as stack:
+        # 帧缓冲池与帧队列由 RTSP 服务器和 AI 处理共享，被挤掉的旧帧归还缓冲池
+        shared_frame_pool = FramePool(size=FRAME_POOL_SIZE)
+        shared_frame_queue = FrameQueue(
+            maxsize=FRAME_QUEUE_SIZE, on_drop=lambda item: shared_frame_pool.release(item[0]))  # 满时用新帧替换旧帧
+        await stack.enter_async_context(rtsp_lifespan(shared_frame_queue, shared_frame_pool))
+        await stack.enter_async_context(broadcast_lifespan())
+
+        # 获取网卡地址涉及 ioctl/socket 系统调用，放到线程池中执行，不阻塞事件循环
+        server_ip = await asyncio.to_thread(get_server_ip)  # 使用实际服务器IP
+        rtsp_stream_url_for_ai = f"rtsp://{server_ip}:{settings.RTSP_PORT}{settings.RTSP_PATH}"
+        # 服务器IP和RTSP地址在进程运行期间不变，缓存供 /rtsp-status 使用
+        app.state.server_ip = server_ip
+        app.state.rtsp_url = rtsp_stream_url_for_ai
+
+        await stack.enter_async_context(ai_processor_lifespan(shared_frame_queue, shared_frame_pool, rtsp_stream_url_for_ai))
+        await stack.enter_async_context(periodic_lifespan())
+        logger.info("应用启动完成。")
+
+        logger.info(f"RTSP 服务器地址: {rtsp_stream_url_for_ai}")
+        logger.info(f"FastAPI 服务器运行在: http://{server_ip}:{settings.API_PORT}")
+        logger.info("请在 Android 设备上配置 RTSP 服务器地址进行测试。")
+
+        yield  # 应用运行中
+
+        # 关闭
+        logger.info("应用关闭: 开始清理...")
 
-    # 关闭
-    logger.info("应用关闭: 开始清理...")
-    await shutdown_event()
     logger.info("应用关闭完成。")
 
 
@@ -436,7 +563,8 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title="SafePath RTSP Receiver",
     lifespan=lifespan,
-    debug=True  # 启用调试模式
+    default_response_class=ORJSONResponse,
+    debug=settings.DEBUG  # 调试模式由配置控制，默认关闭
 )
 
 
@@ -446,22 +574,14 @@ async def root():
 
 
 @app.get("/rtsp-status")
-async def rtsp_status():
+async def rtsp_status(request: Request):
     status = {
         "rtsp_running": rtsp_server.is_running if rtsp_server else False,
-        "server_time": datetime.now().isoformat(),
-        "rtsp_url": f"rtsp://{get_server_ip()}:{settings.RTSP_PORT}{settings.RTSP_PATH}"
+        # datetime 由 ORJSONResponse 在 C 层直接格式化为 ISO 8601 字符串
+        "server_time": datetime.now(),
+        "rtsp_url": request.app.state.rtsp_url
     }
     return status
 
-# 启用CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # 在生产环境中应配置具体来源
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# 配置应用
+# 配置应用 (包括 CORS 中间件和安全头中间件)
 setup_app(app)
@@ -9,25 +9,191 @@ RTSP 服务器模块
 
 from ..core.logger import get_logger
 from ..core.config import get_settings
-from gi.repository import Gst, GstRtspServer, GstRtsp, GLib  # type: ignore
+from gi.repository import Gst, GstRtspServer, GstRtsp, GstVideo, GLib  # type: ignore
+import functools
+import logging
 import os
 import gi
 import time
 import threading
-import queue
-from datetime import datetime
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Dict, Any, Callable, cast
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Tuple, cast
 import numpy as np
 
+if TYPE_CHECKING:
+    from ..utils.frame_pool import FramePool
+    from ..utils.frame_queue import FrameQueue
+
 # 设置GStreamer版本
 gi.require_version('Gst', '1.0')
 gi.require_version('GstRtspServer', '1.0')
 gi.require_version('GstRtsp', '1.0')
+gi.require_version('GstVideo', '1.0')
 
 # 获取日志记录器
 logger = get_logger(__name__)
 
+# /push 拉取线程每次 try-pull-sample 的最长等待时间 (纳秒)
+PUSH_PULL_TIMEOUT_NS = Gst.SECOND
+# 管道未处于播放状态 (try-pull-sample 立即返回) 时拉取线程的等待间隔 (秒)
+PUSH_PULL_IDLE_WAIT = 0.01
+
+# 等待主循环开始运行的最长时间 (秒)
+MAINLOOP_READY_TIMEOUT = 5
+
+# 需要记录日志的管道总线消息类型 (sync-message 信号的 detail)，
+# 状态变化消息仅在 DEBUG 级别时监听
+BUS_MESSAGE_TYPES = ("error", "warning", "eos")
+
+# 推流端点允许匿名客户端使用的 RTSP 方法 (不含 PLAY)
+# 保留 GET_PARAMETER 和 SET_PARAMETER 用于可能的协商
+PUSH_ALLOWED_METHODS = (
+    GstRtsp.RTSPMethod.OPTIONS,
+    GstRtsp.RTSPMethod.DESCRIBE,
+    GstRtsp.RTSPMethod.ANNOUNCE,
+    GstRtsp.RTSPMethod.SETUP,
+    GstRtsp.RTSPMethod.RECORD,
+    GstRtsp.RTSPMethod.TEARDOWN,
+    GstRtsp.RTSPMethod.GET_PARAMETER,
+    GstRtsp.RTSPMethod.SET_PARAMETER,
+)
+
+
+@dataclass(frozen=True)
+class _FrameLayout:
+    """一组 caps 对应的帧布局，由每个拉取线程各自缓存
+
+    shape 是拷贝出的紧凑帧形状；strides/offsets 是 caps 对应的默认平面行步长和偏移，
+    缓冲带有 GstVideo.VideoMeta 时以元数据为准。
+    """
+    caps: Gst.Caps
+    shape: Tuple[int, ...]
+    channels: int  # 打包格式每像素字节数 (3/4)，平面格式为 0
+    planes: Tuple[Tuple[int, int], ...]  # 每个平面的 (行数, 每行有效字节数)
+    strides: Tuple[int, ...]
+    offsets: Tuple[int, ...]
+
+
+def _copy_frame(data: Any, layout: _FrameLayout, strides: Tuple[int, ...],
+                offsets: Tuple[int, ...], dest: np.ndarray) -> None:
+    """按平面偏移和行步长把映射的帧数据拷贝为紧凑帧
+
+    GStreamer 的行可能带有填充 (I420 色度行按 4 字节对齐，硬件转换输出的 BGRx 行距
+    常大于 width * 4)，按步长构造视图后拷贝，不会把填充字节当作像素。
+
+    Args:
+        data: 映射的缓冲数据
+        layout: 帧布局
+        strides: 每个平面的行步长
+        offsets: 每个平面的起始偏移
+        dest: 形状为 layout.shape 的 C 连续目标数组
+    """
+    if layout.channels:
+        height, width = layout.shape[:2]
+        src = np.ndarray((height, width, layout.channels), dtype=np.uint8, buffer=data,
+                         offset=offsets[0], strides=(strides[0], layout.channels, 1))
+        # BGRx 在拷贝时一并丢弃第四通道
+        np.copyto(dest, src[:, :, :3])
+        return
+
+    # 平面格式: 各平面依次紧凑排列在目标数组中 (I420 为 Y、U、V)
+    flat = dest.reshape(-1)
+    pos = 0
+    for (rows, row_bytes), stride, offset in zip(layout.planes, strides, offsets):
+        src = np.ndarray((rows, row_bytes), dtype=np.uint8, buffer=data,
+                         offset=offset, strides=(stride, 1))
+        flat[pos:pos + rows * row_bytes].reshape(rows, row_bytes)[...] = src
+        pos += rows * row_bytes
+
+
+@functools.lru_cache(maxsize=1)
+def _anonymous_record_permissions() -> GstRtspServer.RTSPPermissions:
+    """构建推流端点的匿名角色权限，整个进程只构建一次"""
+    permissions = GstRtspServer.RTSPPermissions()
+    for method in PUSH_ALLOWED_METHODS:
+        permissions.add_permission_for_role(
+            "anonymous", method.value_names[0], True)
+    return permissions
+
+
+def _find_missing_elements(*names: str) -> List[str]:
+    """返回当前 GStreamer 安装中缺少的元素名称"""
+    return [name for name in names if Gst.ElementFactory.find(name) is None]
+
+
+def _create_decode_chain(use_nvcodec: bool, use_vaapi: bool) -> str:
+    """选择 H264 解码及颜色空间转换部分的管道
+
+    优先级: 配置开启的 NVIDIA 硬件解码 > 配置开启的 VA-API 硬件解码 > 多线程 avdec_h264。
+    硬件路径在 GPU 上转换为 4 字节对齐的 BGRx；软件路径直接输出解码器原生的
+    I420，不在流线程上做 YUV->BGR 转换，由 AI 消费端只对实际推理的帧转换。
+
+    Args:
+        use_nvcodec: 是否使用 NVIDIA 硬件解码
+        use_vaapi: 是否使用 VA-API 硬件解码
+
+    Returns:
+        str: 以 " ! " 结尾的管道片段
+    """
+    if use_nvcodec:
+        missing = _find_missing_elements("nvv4l2decoder", "nvvideoconvert")
+        if not missing:
+            return (
+                "nvv4l2decoder ! "  # NVDEC 硬件解码 H264
+                "nvvideoconvert ! "  # GPU 转换颜色空间
+                "video/x-raw,format=BGRx ! "  # 输出BGRx格式，回调中去掉第四通道
+            )
+        logger.warning(
+            f"USE_NVCODEC 已开启，但缺少 GStreamer 元素 {', '.join(missing)}，回退到其他解码器")
+
+    if use_vaapi:
+        # gstreamer-vaapi 只在能打开 VA 显示设备时注册元素
+        missing = _find_missing_elements("vaapih264dec", "vaapipostproc")
+        if not missing:
+            return (
+                "vaapih264dec ! "  # VA-API 硬件解码 H264
+                "vaapipostproc ! "  # 在 GPU 上转换颜色空间
+                "video/x-raw,format=BGRx ! "
+            )
+        logger.warning(
+            f"USE_VAAPI 已开启，但缺少 GStreamer 元素 {', '.join(missing)}，回退到软件解码")
+
+    # avdec_h264 在部分构建中默认单线程解码，显式使用一半的 CPU 核心
+    threads = max(1, (os.cpu_count() or 2) // 2)
+    return (
+        f"avdec_h264 max-threads={threads} output-corrupt=false ! "  # 解码 H264
+        "videoconvert ! "  # 解码器已输出 I420 时直通，不做转换
+        "video/x-raw,format=I420 ! "  # 输出 YUV 4:2:0 平面格式，数据量为 BGR 的一半
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _build_push_pipeline(use_nvcodec: bool, use_vaapi: bool) -> str:
+    """构建推流端点的 pipeline 描述字符串
+
+    管道只取决于配置和已安装的 GStreamer 插件，进程内每种配置只构建一次。
+
+    Args:
+        use_nvcodec: 是否使用 NVIDIA 硬件解码
+        use_vaapi: 是否使用 VA-API 硬件解码
+
+    Returns:
+        str: Pipeline 描述字符串
+    """
+    decode = _create_decode_chain(use_nvcodec, use_vaapi)
+    # 此管道将解码H264并输出原始视频帧到 appsink
+    pipeline = (
+        "rtph264depay name=depay0 ! "
+        "h264parse name=parse0 config-interval=-1 ! "  # 添加 config-interval=-1
+        f"{decode}"
+        # 解码与 appsink 分属不同线程，帧处理变慢时丢弃旧帧而不是阻塞解码
+        "queue name=sinkqueue0 leaky=downstream max-size-buffers=2 max-size-bytes=0 max-size-time=0 ! "
+        "appsink name=push_appsink emit-signals=false drop=true max-buffers=1 sync=false"  # 尽快处理最新帧，由拉取线程读取
+    )
+    logger.info(f"创建 /push 推流端点管道 ({pipeline})")
+    return pipeline
+
 
 class RtspServer:
     """RTSP 服务器类
@@ -44,18 +210,23 @@ class RtspServer:
 
         # 服务器状态
         self._running = False
-        self._clients: Dict[str, GstRtspServer.RTSPClient] = {}
-        self._lock = threading.Lock()  # General lock for client list
+        self._clients: Dict[int, GstRtspServer.RTSPClient] = {}
+        self._lock = threading.Lock()  # 保护客户端字典的写入，读取数量无需加锁
 
         # GStreamer 组件
         self.server: Optional[GstRtspServer.RTSPServer] = None
         self.push_factory: Optional[GstRtspServer.RTSPMediaFactory] = None
         self.mainloop: Optional[GLib.MainLoop] = None
+        self._context: Optional[GLib.MainContext] = None
+        # 主循环已开始分发事件
+        self._ready = threading.Event()
         # For /push endpoint processing
         self.push_appsink: Optional[Gst.Element] = None
 
         # 帧队列 - 用于存储从appsink获取的帧，供AI处理使用
-        self.frame_queue: Optional[queue.Queue] = None
+        self.frame_queue: Optional["FrameQueue"] = None
+        # 帧缓冲池 - 复用预分配的帧内存，消费者用完后归还
+        self.frame_pool: Optional["FramePool"] = None
 
         # Roboflow model (placeholder - initialize appropriately)
         # self.roboflow_model = None
@@ -72,24 +243,12 @@ class RtspServer:
         Gst.init(None)
 
     def _create_push_pipeline(self) -> str:
-        """创建推流端点的 GStreamer pipeline，输出解码后的 BGR 帧
+        """创建推流端点的 GStreamer pipeline，输出解码后的 I420/BGRx 帧
 
         Returns:
             str: Pipeline 描述字符串
         """
-        logger.info(
-            "创建 /push 推流端点管道 (rtph264depay ! h264parse config-interval=-1 ! avdec_h264 ! videoconvert ! video/x-raw,format=BGR ! appsink)")
-        # 此管道将解码H264并输出BGR原始视频帧到 appsink
-        pipeline = (
-            "rtph264depay name=depay0 ! "
-            "h264parse name=parse0 config-interval=-1 ! "  # 添加 config-interval=-1
-            "avdec_h264 ! "  # 解码 H264
-            "videoconvert ! "  # 转换颜色空间
-            "video/x-raw,format=BGR ! "  # 指定输出BGR格式
-            "appsink name=push_appsink emit-signals=true drop=true max-buffers=1 sync=false"  # 尽快处理最新帧
-        )
-        logger.debug(f"/push 推流端点处理管道: {pipeline}")
-        return pipeline
+        return _build_push_pipeline(self.settings.USE_NVCODEC, self.settings.USE_VAAPI)
 
     def _setup_media_factories(self) -> None:
         """配置 RTSP MediaFactory"""
@@ -108,29 +267,8 @@ class RtspServer:
         self.push_factory.set_latency(0)
         self.push_factory.set_eos_shutdown(False)  # Keep push endpoint alive
 
-        # 为推流端点添加权限
-        permissions = GstRtspServer.RTSPPermissions()
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.ANNOUNCE.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.RECORD.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.SETUP.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.TEARDOWN.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.OPTIONS.value_names[0], True)
-        # 保留 GET_PARAMETER 和 SET_PARAMETER 用于可能的协商
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.GET_PARAMETER.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.SET_PARAMETER.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.TEARDOWN.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.OPTIONS.value_names[0], True)
-        permissions.add_permission_for_role(
-            "anonymous", GstRtsp.RTSPMethod.DESCRIBE.value_names[0], True)
+        # 为推流端点添加权限 (进程内共享同一个权限对象)
+        permissions = _anonymous_record_permissions()
         self.push_factory.set_permissions(permissions)
         logger.info("为推流端点 /push 设置了更严格的权限 (移除了 PLAY)")
 
@@ -145,138 +283,226 @@ class RtspServer:
                               media: GstRtspServer.RTSPMedia) -> None:
         """媒体构建回调 (仅 /push)"""
         logger.info(f"媒体已构建 for /push factory: {factory}")
-        element = media.get_element()
-        ret, state, pending = element.get_state(Gst.SECOND)
-        logger.info(
-            f"/push 媒体构建后状态: {state.value_nick}, 待定状态: {pending.value_nick}")
+        # 回调运行在主循环线程上，只做不等待的状态查询，避免阻塞其他 RTSP 请求；
+        # 状态转换由 RTSPMedia 异步完成
+        if logger.isEnabledFor(logging.DEBUG):
+            ret, state, pending = media.get_element().get_state(0)
+            logger.debug("/push 媒体构建后状态: %s, 待定状态: %s",
+                         state.value_nick, pending.value_nick)
 
     def _on_push_media_configure(self, factory: GstRtspServer.RTSPMediaFactory,
                                  media: GstRtspServer.RTSPMedia) -> None:
         """推流端点媒体配置回调"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
         logger.info(
-            f"[{timestamp}] _on_push_media_configure invoked for /push. Media: {media}, Factory: {factory}")
+            f"_on_push_media_configure invoked for /push. Media: {media}, Factory: {factory}")
         pipeline = media.get_element()
         if not pipeline:
             logger.error(
-                f"[{timestamp}] Failed to get pipeline from media for /push.")
+                "Failed to get pipeline from media for /push.")
             return
 
         appsink = pipeline.get_by_name("push_appsink")
         if not appsink:
             logger.error(
-                f"[{timestamp}] 'push_appsink' not found in /push pipeline.")
+                "'push_appsink' not found in /push pipeline.")
             return
 
         logger.info(
-            f"[{timestamp}] Configuring /push appsink (push_appsink) properties.")
-        # Properties are already set in pipeline string, but can be confirmed or overridden here if needed.
-        # appsink.set_property("emit-signals", True)
-        # appsink.set_property("max-buffers", 1)
-        # appsink.set_property("drop", True)
-        # appsink.set_property("sync", False)
-
-        appsink.connect("new-sample", self._on_new_sample_from_push)
+            "Configuring /push appsink (push_appsink) properties.")
+        # max-buffers/drop/sync 已在管道字符串中设置。
+        # 不保留 last-sample (省去每帧一次额外的引用和一帧内存)，EOS 时不等待剩余样本被取走
+        appsink.set_property("enable-last-sample", False)
+        appsink.set_property("wait-on-eos", False)
+
+        # 媒体准备好 (管道进入 PAUSED) 后启动拉取线程，媒体释放时通知线程退出
+        stop = threading.Event()
+        media.connect("prepared", lambda _media: threading.Thread(
+            target=self._pull_push_samples, args=(appsink, stop),
+            name="push-sample-puller", daemon=True).start())
+        media.connect("unprepared", lambda _media: stop.set())
         self.push_appsink = appsink  # Keep a reference
 
         logger.info(
-            f"[{timestamp}] /push appsink (push_appsink) configured and 'new-sample' signal connected: "
+            f"/push appsink (push_appsink) configured, samples pulled by a dedicated thread: "
             f"emit-signals={appsink.get_property('emit-signals')}, "
             f"max-buffers={appsink.get_property('max-buffers')}, "
             f"drop={appsink.get_property('drop')}, "
-            f"sync={appsink.get_property('sync')}"
+            f"sync={appsink.get_property('sync')}, "
+            f"enable-last-sample={appsink.get_property('enable-last-sample')}"
         )
 
         self._configure_media(media, "Push endpoint (/push)")
-        logger.info(f"[{timestamp}] Finished configuring /push media.")
-
-    def _on_new_sample_from_push(self, appsink: Gst.Element) -> Gst.FlowReturn:
-        """从 /push 管道的 appsink 接收到新样本时的回调"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
-        # logger.debug( # 减少此高频日志的冗余
-        #     f"[{timestamp}] _on_new_sample_from_push invoked for appsink: {appsink.get_name()}")
-
-        sample = appsink.emit("pull-sample")
-        if not sample:
-            # logger.warning( # 减少冗余
-            #     f"[{timestamp}] push_appsink pull-sample did not return a sample. Appsink: {appsink.get_name()}. Returning FLUSHING.")
-            return Gst.FlowReturn.FLUSHING  # Or OK if we want to ignore this and continue
+        logger.info("Finished configuring /push media.")
 
-        buffer = sample.get_buffer()
-        if not buffer:
-            logger.warning(
-                f"[{timestamp}] push_appsink pull-sample returned a sample with no buffer. Appsink: {appsink.get_name()}. Returning ERROR.")
-            return Gst.FlowReturn.ERROR
+    def _parse_caps(self, caps: Gst.Caps, sink_name: str) -> Optional[_FrameLayout]:
+        """解析 appsink 输出的 caps，得到帧布局
 
-        # --- 开始 Roboflow 集成准备 ---
-        caps = sample.get_caps()
-        if not caps:
-            logger.warning(
-                f"[{timestamp}] Sample from {appsink.get_name()} has no caps. Cannot process for Roboflow.")
-            return Gst.FlowReturn.OK  # Or ERROR, depending on how strictly to handle
+        Args:
+            caps: 样本的 caps
+            sink_name: appsink 名称（用于日志）
 
+        Returns:
+            Optional[_FrameLayout]: 帧布局，解析失败时返回 None
+        """
         structure = caps.get_structure(0)
         if not structure:
             logger.warning(
-                f"[{timestamp}] Caps from {appsink.get_name()} has no structure. Cannot process for Roboflow.")
-            return Gst.FlowReturn.OK
+                f"Caps from {sink_name} has no structure. Cannot process for Roboflow.")
+            return None
 
         try:
             height = structure.get_value("height")
             width = structure.get_value("width")
             expected_format = structure.get_value("format")
-            if expected_format != "BGR":
-                logger.warning(
-                    f"[{timestamp}] Expected BGR format from push_appsink, got {expected_format}. Roboflow might not work as expected.")
         except TypeError as e:  # More specific exception
             logger.error(
-                f"[{timestamp}] Error getting caps structure (height, width, format) from {appsink.get_name()}: {e}. Caps: {caps.to_string()}")
-            return Gst.FlowReturn.OK
+                f"Error getting caps structure (height, width, format) from {sink_name}: {e}. Caps: {caps.to_string()}")
+            return None
+        if expected_format not in ("I420", "BGR", "BGRx"):
+            logger.warning(
+                f"Expected I420/BGR/BGRx format from push_appsink, got {expected_format}. Cannot process for Roboflow.")
+            return None
+
+        # 平面偏移和行步长以 VideoInfo 为准，不假定数据紧凑排列
+        info = GstVideo.VideoInfo.new_from_caps(caps)
+        if info is None:
+            logger.error(f"Cannot parse video info from {sink_name} caps: {caps.to_string()}")
+            return None
+        n_planes = info.finfo.n_planes
+        strides = tuple(info.stride[:n_planes])
+        offsets = tuple(info.offset[:n_planes])
+
+        if expected_format == "I420":
+            if width % 2 or height % 2:
+                logger.warning(
+                    f"I420 frames from {sink_name} have odd size {width}x{height}, which cannot be converted to BGR. Skipping.")
+                return None
+            # I420 以 (height * 3 / 2, width) 的二维数组传递: Y 平面在上，U、V 平面依次在下
+            shape: Tuple[int, ...] = (height * 3 // 2, width)
+            channels = 0
+            planes = ((height, width), (height // 2, width // 2), (height // 2, width // 2))
+        else:
+            # BGR 和 BGRx 都拷贝为 (height, width, 3)
+            shape = (height, width, 3)
+            channels = 4 if expected_format == "BGRx" else 3
+            planes = ((height, width * channels),)
+        logger.info(f"{sink_name} caps 已更新: {width}x{height} {expected_format}, "
+                    f"strides={strides}, offsets={offsets}, size={info.size}")
+        return _FrameLayout(caps=caps, shape=shape, channels=channels, planes=planes,
+                            strides=strides, offsets=offsets)
+
+    def _pull_push_samples(self, appsink: Gst.Element, stop: threading.Event) -> None:
+        """/push 样本拉取线程: 在独立线程中循环 try-pull-sample 处理最新帧
+
+        不使用 new-sample 信号，省去每帧的信号发射开销，帧处理也不占用 GStreamer 流线程。
+        每个 /push 媒体有各自的拉取线程，帧布局缓存在线程内，不同推流端的分辨率互不影响。
+
+        Args:
+            appsink: 推流管道的 appsink
+            stop: 媒体释放 (unprepared) 时设置的停止事件
+        """
+        sink_name = appsink.get_name()
+        layout: Optional[_FrameLayout] = None
+        logger.info(f"{sink_name} 样本拉取线程已启动")
+        while not stop.is_set():
+            sample = appsink.emit("try-pull-sample", PUSH_PULL_TIMEOUT_NS)
+            if sample is None:
+                # 超时、EOS 或管道已不在 PAUSED/PLAYING 状态
+                if appsink.get_property("eos"):
+                    break
+                stop.wait(PUSH_PULL_IDLE_WAIT)
+                continue
+            # caps 在一次协商后保持不变，只在 caps 变化时重新解析帧布局
+            caps = sample.get_caps()
+            if not caps:
+                logger.warning(
+                    f"Sample from {sink_name} has no caps. Cannot process for Roboflow.")
+                continue
+            # 单个样本出错只记录日志，线程继续处理后续样本，否则该流不会再有帧送往 AI
+            try:
+                if layout is None or (caps is not layout.caps and not caps.is_equal(layout.caps)):
+                    layout = self._parse_caps(caps, sink_name)
+                    if layout is None:
+                        continue
+                self._process_push_sample(sample, sink_name, layout)
+            except Exception:
+                logger.exception(f"Error processing sample from {sink_name}")
+        logger.info(f"{sink_name} 样本拉取线程已退出")
+
+    def _process_push_sample(self, sample: Gst.Sample, sink_name: str,
+                             layout: _FrameLayout) -> Gst.FlowReturn:
+        """处理从 /push 管道 appsink 拉取的样本
+
+        Args:
+            sample: 拉取到的样本
+            sink_name: appsink 名称（用于日志）
+            layout: 样本 caps 对应的帧布局
+        """
+        buffer = sample.get_buffer()
+        if not buffer:
+            logger.warning(
+                f"push_appsink pull-sample returned a sample with no buffer. Appsink: {sink_name}. Returning ERROR.")
+            return Gst.FlowReturn.ERROR
 
+        # --- 开始 Roboflow 集成准备 ---
         success, map_info = buffer.map(Gst.MapFlags.READ)
         if not success:
             logger.error(
-                f"[{timestamp}] Failed to map buffer data from {appsink.get_name()} for Roboflow processing.")
+                f"Failed to map buffer data from {sink_name} for Roboflow processing.")
             # buffer.unmap(map_info) # Should not be called if map failed
             return Gst.FlowReturn.ERROR
 
         try:
-            # 创建 NumPy 数组，确保数据类型和形状正确
-            # BGR 格式通常是 (height, width, 3)
-            frame_data = np.ndarray(
-                (height, width, 3),  # (height, width, channels)
-                buffer=map_info.data,
-                dtype=np.uint8
-            )
-            
+            # 硬件解码等上游元素可能附带 VideoMeta 给出实际的平面偏移和行步长
+            meta = GstVideo.buffer_get_video_meta(buffer)
+            if meta is not None:
+                n_planes = len(layout.planes)
+                strides = tuple(meta.stride[:n_planes])
+                offsets = tuple(meta.offset[:n_planes])
+            else:
+                strides, offsets = layout.strides, layout.offsets
+
             # --- 将帧数据和时间戳放入队列 ---
             if self.frame_queue is not None:
                 try:
-                    # 强制使用当前时间的纳秒级 Epoch 时间戳
-                    gst_timestamp_ns = int(time.time() * 1_000_000_000)
-
-                    # 创建一个 frame_data 的深拷贝，因为 buffer 将被 GStreamer 回收
-                    frame_to_queue = np.copy(frame_data)
-                    self.frame_queue.put((frame_to_queue, gst_timestamp_ns), block=False)
-                    logger.debug(f"Frame (shape: {frame_to_queue.shape}, pts_ns: {gst_timestamp_ns}) put into queue. Queue size: {self.frame_queue.qsize()}")
-                except queue.Full:
-                    logger.warning(
-                        f"[{timestamp}] Frame queue is full. Dropping frame from {appsink.get_name()}. "
-                        f"Queue size: {self.frame_queue.qsize()}"
-                    )
+                    # 纳秒级 Epoch 时间戳: 消费者据此生成帧的 datetime，不能使用 PTS 或单调时钟
+                    gst_timestamp_ns = time.time_ns()
+
+                    # buffer 将被 GStreamer 回收，需要把帧数据拷贝出来
+                    if self.frame_pool is not None:
+                        # 拷贝到池中的预分配缓冲，不再每帧分配新数组
+                        frame_to_queue = self.frame_pool.acquire(layout.shape)
+                        if frame_to_queue is None:
+                            logger.warning(
+                                f"Frame pool exhausted. Dropped frame from {sink_name}.")
+                            return Gst.FlowReturn.OK
+                    else:
+                        frame_to_queue = np.empty(layout.shape, dtype=np.uint8)
+                    try:
+                        _copy_frame(map_info.data, layout, strides, offsets, frame_to_queue)
+                    except Exception:
+                        if self.frame_pool is not None:
+                            self.frame_pool.release(frame_to_queue)
+                        raise
+                    # 队列已满时用新帧替换最旧的帧，不阻塞 GStreamer 流线程；
+                    # AI 处理慢于推流帧率时这是常态，只在调试时记录
+                    if self.frame_queue.put((frame_to_queue, gst_timestamp_ns)):
+                        logger.debug("Frame queue is full. Replaced oldest frame for %s.", sink_name)
+                    logger.debug("Frame (shape: %s, pts_ns: %s) put into queue. Queue size: %d",
+                                 frame_to_queue.shape, gst_timestamp_ns, self.frame_queue.qsize())
                 except Exception as e:
                     logger.error(
-                        f"[{timestamp}] Error putting frame to queue from {appsink.get_name()}: {e}", exc_info=True)
+                        f"Error putting frame to queue from {sink_name}: {e}", exc_info=True)
             else:
                 logger.warning(
-                    f"[{timestamp}] Frame queue is not initialized in RtspServer. Cannot put frame from {appsink.get_name()}.")
+                    f"Frame queue is not initialized in RtspServer. Cannot put frame from {sink_name}.")
             # ------------------------------------
 
         finally:
             buffer.unmap(map_info)  # 确保 unmap 操作在 try/finally 中
 
         # logger.debug( # 可以按需开启此日志
-        #     f"[{timestamp}] Converted Gst.Buffer to NumPy array for Roboflow. Shape: {frame_for_roboflow.shape}")
+        #     f"Converted Gst.Buffer to NumPy array for Roboflow. Shape: {frame_for_roboflow.shape}")
 
         return Gst.FlowReturn.OK  # 表示样本已成功处理
 
@@ -290,8 +516,14 @@ class RtspServer:
         element = media.get_element()
         bus = element.get_bus()
         if (bus):
-            bus.add_signal_watch()
-            bus.connect('message', self._on_bus_message)
+            # 使用 sync-message 信号观察总线消息: 不从总线取走消息，
+            # RTSPMedia 自身的总线监听仍能收到全部消息；按消息类型细分的信号
+            # 在 C 层过滤，只有关心的消息类型才会调用 Python 回调
+            bus.enable_sync_message_emission()
+            for message_type in BUS_MESSAGE_TYPES:
+                bus.connect(f"sync-message::{message_type}", self._on_bus_message)
+            if logger.isEnabledFor(logging.DEBUG):
+                bus.connect("sync-message::state-changed", self._on_bus_message)
         else:
             logger.warning(f"Could not get bus for media element {endpoint}")
         logger.info(f"媒体元素 {endpoint} 已配置总线监听。状态将由 RTSP 服务器管理。")
@@ -299,44 +531,47 @@ class RtspServer:
     def _on_client_connected(self, server: GstRtspServer.RTSPServer,
                              client: GstRtspServer.RTSPClient) -> None:
         """客户端连接回调"""
+        # 锁内只做字典修改，日志和信号连接放在锁外
+        client_id = id(client)
         with self._lock:
-            client_id = str(id(client))
             self._clients[client_id] = client
-            # 移除 mount_points 的获取和迭代，以匹配 server.py.bak3 的行为并解决 TypeError
-            logger.info(f"客户端连接: {client_id}")
+        # 移除 mount_points 的获取和迭代，以匹配 server.py.bak3 的行为并解决 TypeError
+        logger.info(f"客户端连接: {client_id}")
 
         client.connect('closed', self._on_client_disconnected)
 
     def _on_client_disconnected(self, client: GstRtspServer.RTSPClient) -> None:
         """客户端断开回调"""
+        client_id = id(client)
         with self._lock:
-            client_id = str(id(client))
-            if client_id in self._clients:
-                del self._clients[client_id]
-                logger.info(f"客户端断开: {client_id}")
+            removed = self._clients.pop(client_id, None)
+        if removed is not None:
+            logger.info(f"客户端断开: {client_id}")
 
     def _on_bus_message(self, bus: Gst.Bus, message: Gst.Message) -> None:
-        """处理管道总线消息"""
+        """处理管道总线消息 (在发出消息的流线程中调用，只做日志记录)"""
         t = message.type
+        if t == Gst.MessageType.STATE_CHANGED:
+            # 预滚动期间每个元素都会发出状态变化，只在 DEBUG 级别时才解析和格式化
+            # 状态变化消息只由元素发出，无需再检查 src 类型
+            if not logger.isEnabledFor(logging.DEBUG):
+                return
+            old_state, new_state, pending_state = message.parse_state_changed()
+            logger.debug("状态变化 on %s: %s -> %s (待定: %s)", message.src.get_name(),
+                         old_state.value_nick, new_state.value_nick, pending_state.value_nick)
+            return
+
         src_name = message.src.get_path_string() if message.src else 'Unknown Source'
         if t == Gst.MessageType.ERROR:
             err, debug = message.parse_error()
-            logger.error(f"GStreamer错误 from {src_name}: {err.message}")
-            logger.debug(f"调试信息: {debug}")
+            logger.error("GStreamer错误 from %s: %s", src_name, err.message)
+            logger.debug("调试信息: %s", debug)
         elif t == Gst.MessageType.WARNING:
             warn, debug = message.parse_warning()
-            logger.warning(f"GStreamer警告 from {src_name}: {warn.message}")
-            logger.debug(f"调试信息: {debug}")
-        elif t == Gst.MessageType.STATE_CHANGED:
-            if message.src and isinstance(message.src, Gst.Element):
-                old_state, new_state, pending_state = message.parse_state_changed()
-                logger.info(
-                    f"状态变化 on {message.src.get_name()} ({src_name}): {old_state.value_nick} -> {new_state.value_nick} (待定: {pending_state.value_nick})"
-                )
+            logger.warning("GStreamer警告 from %s: %s", src_name, warn.message)
+            logger.debug("调试信息: %s", debug)
         elif t == Gst.MessageType.EOS:
-            logger.info(f"收到流结束信号 from {src_name}")
-        # else:
-        #     logger.debug(f"Bus message: {t.value_nick} from {src_name}")
+            logger.info("收到流结束信号 from %s", src_name)
 
     def start(self) -> None:
         """启动 RTSP 服务器"""
@@ -370,8 +605,11 @@ class RtspServer:
             logger.info("连接客户端连接回调...")
             self.server.connect('client-connected', self._on_client_connected)
 
-            logger.info("将服务器附加到主上下文...")
-            self.server.attach(None)
+            # 服务器使用专用的主上下文，客户端连接、媒体配置和总线监听
+            # 都在同一个主循环线程中分发，不与进程中其他 GLib 用户共享默认上下文
+            logger.info("将服务器附加到专用主上下文...")
+            self._context = GLib.MainContext.new()
+            self.server.attach(self._context)
             logger.info(
                 f"RTSP 服务器启动:\n"
                 f"- 推流地址: rtsp://0.0.0.0:{self.settings.RTSP_PORT}/push\n"
@@ -380,17 +618,24 @@ class RtspServer:
             self._running = True
 
             logger.info("创建GLib主循环...")
-            self.mainloop = GLib.MainLoop()
+            self.mainloop = GLib.MainLoop.new(self._context, False)
             if self.mainloop is None:
                 raise RuntimeError("无法创建主循环")
 
+            # 主循环开始分发后由空闲回调设置就绪事件，不再固定等待
+            self._ready.clear()
+            ready_source = GLib.idle_source_new()
+            ready_source.set_callback(self._on_mainloop_ready)
+            ready_source.attach(self._context)
+
             logger.info("启动GLib主循环线程...")
             self._mainloop_thread = threading.Thread(
-                target=self.mainloop.run, daemon=True)
+                target=self._run_mainloop, name="rtsp-mainloop", daemon=True)
             self._mainloop_thread.start()
 
             logger.info("等待主循环启动...")
-            time.sleep(1)  # 给主循环一点时间启动
+            if not self._ready.wait(MAINLOOP_READY_TIMEOUT):
+                logger.warning(f"主循环未在 {MAINLOOP_READY_TIMEOUT} 秒内开始运行")
 
             logger.info("RTSP服务器已完全启动并运行")
 
@@ -399,6 +644,22 @@ class RtspServer:
             self.stop()  # 尝试清理
             raise
 
+    def _on_mainloop_ready(self, *args: Any) -> bool:
+        """主循环第一次分发时调用的空闲回调，设置就绪事件后移除自身"""
+        self._ready.set()
+        return GLib.SOURCE_REMOVE
+
+    def _run_mainloop(self) -> None:
+        """主循环线程: 将专用上下文设为线程默认上下文后运行主循环
+
+        RTSPMedia 等按线程默认上下文挂载的内部源 (如媒体总线监听) 因此同样由本线程分发。
+        """
+        self._context.push_thread_default()
+        try:
+            self.mainloop.run()
+        finally:
+            self._context.pop_thread_default()
+
     def stop(self) -> None:
         """停止 RTSP 服务器"""
         if not self._running:
@@ -450,9 +711,11 @@ class RtspServer:
         return self._running
 
     def get_client_count(self) -> int:
-        """获取当前连接的客户端数量"""
-        with self._lock:
-            return len(self._clients)
+        """获取当前连接的客户端数量
+
+        只读取字典长度，CPython 中 len(dict) 是原子操作，无需与写入方争用锁。
+        """
+        return len(self._clients)
 
     def __enter__(self) -> 'RtspServer':
         """上下文管理器入口"""
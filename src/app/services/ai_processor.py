@@ -284,7 +284,8 @@ class AIProcessor:
         当从 InferencePipeline 接收到新的预测结果时调用的回调函数。
         注意：此函数在 InferencePipeline 的内部线程中执行。
         """
-        logger.debug(f"AIProcessor._on_prediction: Received predictions type: {type(predictions)}, frame data type: {type(video_frame_from_pipeline)}")
+        logger.debug("AIProcessor._on_prediction: Received predictions type: {}, frame data type: {}",
+                     type(predictions), type(video_frame_from_pipeline))
         try:
             frame_details = self._extract_frame_details(video_frame_from_pipeline)
 
@@ -305,7 +306,8 @@ class AIProcessor:
                     "timestamp": frame_details["timestamp"], # Already a datetime object or suitable raw value
                     "image_shape": frame_details["image_shape"]
                 }
-                logger.debug(f"AIProcessor._on_prediction: Preparing to schedule on_prediction_callback for frame ID {frame_details['frame_id']}. Loop running: {self.main_event_loop.is_running()}")
+                logger.debug("AIProcessor._on_prediction: Preparing to schedule on_prediction_callback for frame ID {}. Loop running: {}",
+                             frame_details['frame_id'], self.main_event_loop.is_running())
 
                 future = asyncio.run_coroutine_threadsafe(
                     self.on_prediction_callback(predictions_dict, frame_info_for_callback), self.main_event_loop)
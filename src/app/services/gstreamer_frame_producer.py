@@ -6,13 +6,18 @@ GStreamer 帧生产者模块
 """
 import queue
 import time
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 from datetime import datetime
 from loguru import logger
 from inference.core.interfaces.camera.entities import VideoFrame, VideoFrameProducer, SourceProperties
+import cv2
 import numpy as np
 import gi
 
+if TYPE_CHECKING:
+    from app.utils.frame_pool import FramePool
+    from app.utils.frame_queue import FrameQueue
+
 gi.require_version('Gst', '1.0')
 gi.require_version('GstApp', '1.0')
 gi.require_version('GstRtspServer', '1.0')
@@ -24,18 +29,21 @@ class GStreamerFrameProducer(VideoFrameProducer):
     这个类充当GStreamer appsink和Roboflow InferencePipeline之间的桥梁。
     """
 
-    def __init__(self, frame_queue: queue.Queue, fps: float, width: int, height: int, source_id: int = 0):
+    def __init__(self, frame_queue: "FrameQueue", fps: float, width: int, height: int, source_id: int = 0,
+                 frame_pool: Optional["FramePool"] = None):
         """
         初始化帧生产者。
 
         Args:
-            frame_queue: 存储从GStreamer appsink获取的帧的队列
+            frame_queue: 存储从GStreamer appsink获取的帧的队列 (满时丢弃最旧帧)
             fps: 视频的帧率
             width: 视频帧宽度
             height: 视频帧高度
             source_id: 视频源标识符
+            frame_pool: 队列中帧所属的缓冲池，帧拷贝出来后归还
         """
         self.frame_queue = frame_queue
+        self.frame_pool = frame_pool
         self.running = False
         self._fps = fps
         self._width = width
@@ -70,6 +78,14 @@ class GStreamerFrameProducer(VideoFrameProducer):
 
             # 使用 timeout 来避免无限阻塞，并允许检查 self.running 状态
             numpy_frame, timestamp_ns = self.frame_queue.get(timeout=1.0)
+            # 队列中的帧可能是缓冲池的缓冲，拷贝后立即归还；
+            # 二维帧是 I420 平面格式，只对实际读取的帧转换为 BGR
+            if numpy_frame.ndim == 2:
+                image = cv2.cvtColor(numpy_frame, cv2.COLOR_YUV2BGR_I420)
+            else:
+                image = np.copy(numpy_frame)
+            if self.frame_pool is not None:
+                self.frame_pool.release(numpy_frame)
 
             # logger.info(f"GStreamerFrameProducer: Frame obtained from queue. Timestamp_ns: {timestamp_ns}")
 
@@ -92,7 +108,7 @@ class GStreamerFrameProducer(VideoFrameProducer):
 
             # 创建VideoFrame对象，移除无效参数
             video_frame = VideoFrame(
-                image=np.copy(numpy_frame),  # 确保传递图像数据的副本
+                image=image,
                 frame_id=self.frame_id_counter,
                 frame_timestamp=current_timestamp_dt,
                 source_id=self._source_id
@@ -122,7 +138,9 @@ class GStreamerFrameProducer(VideoFrameProducer):
         cleared_count = 0
         while not self.frame_queue.empty():
             try:
-                self.frame_queue.get_nowait()
+                numpy_frame, _ = self.frame_queue.get_nowait()
+                if self.frame_pool is not None:
+                    self.frame_pool.release(numpy_frame)
                 cleared_count += 1
             except queue.Empty:
                 break
@@ -142,7 +142,7 @@ class GStreamerVideoSource(VideoSource):
                     status_update_handlers=self._status_update_handlers,
                 )
                 logger.debug(
-                    f"GStreamerVideoSource.read_frame(): 已获取帧 ID: {video_frame.frame_id}")
+                    "GStreamerVideoSource.read_frame(): 已获取帧 ID: {}", video_frame.frame_id)
             return video_frame
         except Exception as e:
             logger.error(f"GStreamerVideoSource.read_frame(): 读取帧时出错: {e}")
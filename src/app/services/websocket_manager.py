@@ -8,10 +8,13 @@ WebSocket 连接管理器
 """
 from typing import Dict, List, Set, Any, Union
 import json
+import time
 import asyncio
 from fastapi import WebSocket, WebSocketDisconnect
 from loguru import logger
-from datetime import datetime
+
+# 广播时每批发送的客户端数量，批次之间让出事件循环
+BROADCAST_BATCH_SIZE = 50
 
 
 class ConnectionManager:
@@ -41,7 +44,7 @@ class ConnectionManager:
             "type": "connection_status",
             "status": "connected",
             "message": "成功连接到AI分析服务器",
-            "timestamp": int(datetime.now().timestamp() * 1000),
+            "timestamp": int(time.time() * 1000),
             "client_id": client_id
         }
         await self.send_personal_message(welcome_message, client_id)
@@ -78,7 +81,8 @@ class ConnectionManager:
         发送消息给指定客户端
 
         Args:
-            message: 要发送的消息 (可以是字典或字符串)
+            message: 要发送的消息 (可以是字典或字符串)。客户端按文本帧解析 JSON，
+                已编码的消息应以 str 传入，直接作为文本帧发送
             client_id: 客户端标识符
         """
         if client_id in self.active_connections:
@@ -96,20 +100,28 @@ class ConnectionManager:
         """
         广播消息给所有连接的客户端
 
+        客户端数量超过 BROADCAST_BATCH_SIZE 时分批发送，批次之间让出事件循环，
+        避免大量连接时一次广播长时间占用事件循环、推迟下一帧的AI回调。
+        传入已编码的 str 时只编码一次，所有客户端复用同一份文本帧。
+
         Args:
             message: 要广播的消息 (可以是字典或字符串)
         """
+        connections = list(self.active_connections.items())
         disconnected_clients = []
 
-        for client_id, websocket in self.active_connections.items():
-            try:
-                if isinstance(message, str):
-                    await websocket.send_text(message)
-                else:
-                    await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"广播消息给客户端 {client_id} 失败: {e}")
-                disconnected_clients.append(client_id)
+        for start in range(0, len(connections), BROADCAST_BATCH_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            for client_id, websocket in connections[start:start + BROADCAST_BATCH_SIZE]:
+                try:
+                    if isinstance(message, str):
+                        await websocket.send_text(message)
+                    else:
+                        await websocket.send_json(message)
+                except Exception as e:
+                    logger.error(f"广播消息给客户端 {client_id} 失败: {e}")
+                    disconnected_clients.append(client_id)
 
         # 清理断开的连接
         for client_id in disconnected_clients:
@@ -134,10 +146,11 @@ class ConnectionManager:
         try:
             while self.is_running:
                 if self.active_connections:
-                    ping_message = {
-                        "type": "ping",
-                        "timestamp": int(datetime.now().timestamp() * 1000)
-                    }
+                    # 先编码为文本，避免每个客户端各自序列化一次
+                    ping_message = json.dumps(
+                        {"type": "ping", "timestamp": int(time.time() * 1000)},
+                        separators=(",", ":"),
+                    )
                     await self.broadcast(ping_message)
                 await asyncio.sleep(30)  # 每30秒ping一次
         except asyncio.CancelledError:
@@ -3,11 +3,15 @@
 
 本模块包含各种工具函数，包括：
 - FPS 计数器
+- 帧队列
+- 帧缓冲池
 - GStreamer 相关工具函数
 """
 
 # 从各子模块导出主要类和函数
 from app.utils.fps_counter import FPSCounter
+from app.utils.frame_pool import FramePool
+from app.utils.frame_queue import FrameQueue
 from app.utils.gstreamer_utils import (
     create_frame_queue,
     on_new_sample_callback,
@@ -0,0 +1,90 @@
+"""
+帧缓冲池
+
+该模块提供预分配的帧缓冲池，供 GStreamer 采集线程复用帧内存。
+采集线程从池中取出空闲缓冲并拷贝帧数据，消费者用完后归还，
+避免每帧重新分配一整帧大小的数组。
+"""
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 缓冲起始地址的对齐字节数 (缓存行 / AVX-512 向量宽度)
+FRAME_ALIGNMENT = 64
+
+
+class FramePool:
+    """
+    固定数量的预分配帧缓冲池
+
+    缓冲在第一次 acquire 时按帧形状一次性分配为一整块连续内存 (此时才知道分辨率)，
+    分辨率变化时重新分配。通过 release 传回池中取出的数组即可归还，
+    非本池的数组会被忽略，因此消费者可以无条件调用 release。
+    """
+
+    def __init__(self, size: int = 8):
+        """
+        初始化帧缓冲池
+
+        Args:
+            size: 缓冲数量
+        """
+        if size <= 0:
+            raise ValueError("size 必须大于 0")
+        self.size = size
+        self.shape: Optional[Tuple[int, ...]] = None
+        self._buffer: Optional[np.ndarray] = None
+        self._frames: List[np.ndarray] = []
+        self._slots: Dict[int, int] = {}  # id(缓冲) -> 槽位序号
+        self._free: Deque[int] = deque()
+        self._lock = threading.Lock()
+
+    def _allocate(self, shape: Tuple[int, ...]) -> None:
+        """按帧形状分配全部缓冲 (调用方需持有锁)
+
+        所有槽位位于一块起始地址按 FRAME_ALIGNMENT 对齐的连续内存 (size, *shape) 中，
+        每个槽位是其中一帧的视图。
+        """
+        nbytes = self.size * int(np.prod(shape))
+        raw = np.empty(nbytes + FRAME_ALIGNMENT, dtype=np.uint8)
+        offset = -raw.ctypes.data % FRAME_ALIGNMENT
+        self._buffer = raw[offset:offset + nbytes].reshape((self.size, *shape))
+        self._frames = list(self._buffer)
+        self._slots = {id(frame): idx for idx, frame in enumerate(self._frames)}
+        self._free = deque(range(self.size))
+        self.shape = shape
+
+    def acquire(self, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """
+        取出一个空闲缓冲
+
+        Args:
+            shape: 帧形状，如 (height, width, 3)
+
+        Returns:
+            Optional[np.ndarray]: 空闲缓冲，池已耗尽时返回 None
+        """
+        with self._lock:
+            if shape != self.shape:
+                self._allocate(shape)
+            if not self._free:
+                return None
+            return self._frames[self._free.popleft()]
+
+    def release(self, frame: np.ndarray) -> None:
+        """
+        归还缓冲
+
+        Args:
+            frame: acquire 返回的数组
+        """
+        with self._lock:
+            idx = self._slots.get(id(frame))
+            if idx is not None and self._frames[idx] is frame:
+                self._free.append(idx)
+
+    def available(self) -> int:
+        """当前空闲缓冲数量"""
+        return len(self._free)
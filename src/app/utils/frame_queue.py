@@ -0,0 +1,133 @@
+"""
+帧队列
+
+该模块提供 GStreamer 采集线程与 AI 推理线程之间共享的有界帧队列。
+队列满时丢弃最旧的帧，生产者永远不会阻塞。
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+
+class FrameQueue:
+    """
+    丢弃最旧帧的有界帧队列
+
+    基于 collections.deque 实现，接口与 queue.Queue 保持兼容
+    (put/get/get_nowait/qsize/empty/full/task_done/maxsize)，
+    可以直接替换原先的 queue.Queue 帧队列。
+    与 queue.Queue 不同，put 在队列满时不会阻塞或抛出 queue.Full，
+    而是挤掉最旧的一帧，保证实时流的生产者始终能写入最新帧。
+
+    每个 /push 媒体各有一个采集线程，可能有多个生产者同时 put:
+    put 在锁内完成"检查是否已满、挤掉最旧帧、放入新帧"，被挤掉的帧一定经过 on_drop。
+    消费者只做 popleft (deque 的 popleft 本身是线程安全的)，有帧可取时 get 不加锁，
+    只有消费者需要等待时才通过 Event 唤醒。
+    """
+
+    def __init__(self, maxsize: int = 60, on_drop: Optional[Callable[[Any], None]] = None):
+        """
+        初始化帧队列
+
+        Args:
+            maxsize: 队列最多保留的帧数
+            on_drop: 最旧帧被挤掉时的回调，参数为被丢弃的帧 (如归还帧缓冲)
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize 必须大于 0")
+        self.maxsize = maxsize
+        self._on_drop = on_drop
+        # 不设置 deque 的 maxlen: 满时由 put 显式挤掉最旧帧，保证 on_drop 被调用
+        self._frames: Deque[Any] = deque()
+        self._put_lock = threading.Lock()
+        self._not_empty = threading.Event()
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        放入一帧，队列满时丢弃最旧的帧
+
+        block 和 timeout 仅为兼容 queue.Queue 的调用方式，put 从不阻塞。
+
+        Args:
+            item: 帧数据
+
+        Returns:
+            bool: 是否丢弃了最旧的帧
+        """
+        frames = self._frames
+        with self._put_lock:
+            dropped = len(frames) >= self.maxsize
+            if dropped:
+                try:
+                    dropped_item = frames.popleft()
+                except IndexError:  # 消费者恰好取走了剩余的帧
+                    dropped = False
+            frames.append(item)
+        # 只有消费者清除过事件 (准备等待) 时才需要唤醒
+        if not self._not_empty.is_set():
+            self._not_empty.set()
+        if dropped and self._on_drop is not None:
+            self._on_drop(dropped_item)
+        return dropped
+
+    def put_nowait(self, item: Any) -> bool:
+        """放入一帧，等同于 put"""
+        return self.put(item)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """
+        取出最旧的一帧
+
+        Args:
+            block: 队列为空时是否等待
+            timeout: 最长等待时间(秒)，None 表示一直等待
+
+        Returns:
+            Any: 帧数据
+
+        Raises:
+            queue.Empty: 队列为空且等待超时 (或 block=False)
+        """
+        frames = self._frames
+        try:
+            return frames.popleft()
+        except IndexError:
+            if not block:
+                raise queue.Empty from None
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # 先清除事件再检查队列，避免错过清除前后放入的帧
+            self._not_empty.clear()
+            try:
+                return frames.popleft()
+            except IndexError:
+                pass
+            if deadline is None:
+                self._not_empty.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise queue.Empty
+            self._not_empty.wait(remaining)
+
+    def get_nowait(self) -> Any:
+        """不等待地取出一帧，队列为空时抛出 queue.Empty"""
+        return self.get(block=False)
+
+    def task_done(self) -> None:
+        """兼容 queue.Queue 接口，帧队列不跟踪未完成任务"""
+
+    def qsize(self) -> int:
+        """当前队列中的帧数"""
+        return len(self._frames)
+
+    def empty(self) -> bool:
+        """队列是否为空"""
+        return not self._frames
+
+    def full(self) -> bool:
+        """队列是否已满 (再放入会丢弃最旧帧)"""
+        return len(self._frames) >= self.maxsize
@@ -6,25 +6,25 @@ GStreamer 工具函数模块
 2. 处理appsink回调
 3. 设置FrameProducer
 """
-import queue
 import numpy as np
 from typing import Tuple
 from loguru import logger
 from gi.repository import Gst, GLib, GstApp  # type: ignore
 from app.services.gstreamer_frame_producer import GStreamerFrameProducer
+from app.utils.frame_queue import FrameQueue
 
 
-def create_frame_queue() -> queue.Queue:
+def create_frame_queue() -> FrameQueue:
     """
     创建用于存储视频帧的队列
 
     Returns:
-        Queue对象，用于存储视频帧
+        FrameQueue对象，只保留最新一帧，新帧到达时替换旧帧
     """
-    return queue.Queue(maxsize=60)  # 限制队列大小，防止内存溢出
+    return FrameQueue(maxsize=1)
 
 
-def on_new_sample_callback(sink: Gst.Element, frame_queue: queue.Queue) -> Gst.FlowReturn:
+def on_new_sample_callback(sink: Gst.Element, frame_queue: FrameQueue) -> Gst.FlowReturn:
     """
     GStreamer appsink的回调函数，用于处理新的视频帧样本
 
@@ -84,16 +84,8 @@ def on_new_sample_callback(sink: Gst.Element, frame_queue: queue.Queue) -> Gst.F
             # 复制数据(因为buffer.unmap()后数据将不可用)
             frame_copy = frame_data.copy()
 
-            # 将帧放入队列(带时间戳)
-            if not frame_queue.full():
-                frame_queue.put((frame_copy, pts_time), block=False)
-            else:
-                # 队列已满，丢弃最老的帧并添加新帧
-                try:
-                    _ = frame_queue.get_nowait()
-                    frame_queue.put((frame_copy, pts_time), block=False)
-                except queue.Empty:
-                    pass  # 不应该发生，但为安全起见
+            # 将帧放入队列(带时间戳)，队列已满时 FrameQueue 自动丢弃最老的帧
+            frame_queue.put((frame_copy, pts_time))
 
         finally:
             # 释放buffer映射
@@ -112,7 +104,7 @@ def create_and_setup_gstreamer_frame_producer(
     fps: float = 5.0,
     width: int = 640,
     height: int = 480
-) -> Tuple[GStreamerFrameProducer, queue.Queue]:
+) -> Tuple[GStreamerFrameProducer, FrameQueue]:
     """
     创建并设置GStreamerFrameProducer
 
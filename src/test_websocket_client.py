@@ -35,17 +35,20 @@ async def connect_to_websocket(uri: str):
 
                     # 格式化输出
                     if data.get("type") == "ai_detection":
-                        detections = data.get("data", {}).get("detections", [])
-                        print(
-                            f"\n接收到AI检测结果 [帧ID: {data.get('data', {}).get('frame_id', 'N/A')}]")
-                        print(f"FPS: {data.get('data', {}).get('fps', 'N/A')}")
-                        print(f"检测到 {len(detections)} 个对象:")
-
-                        for i, det in enumerate(detections):
-                            print(f"  {i+1}. 类别: {det.get('class', 'unknown')}, "
-                                  f"置信度: {det.get('confidence', 0):.2f}, "
-                                  f"位置: x={det.get('x_center', 0):.2f}, y={det.get('y_center', 0):.2f}, "
-                                  f"大小: w={det.get('width', 0):.2f}, h={det.get('height', 0):.2f}")
+                        # 合并发送的多条结果位于 batch 字段中
+                        results = data.get("batch") or [data.get("data", {})]
+                        for result in results:
+                            detections = result.get("detections", [])
+                            print(
+                                f"\n接收到AI检测结果 [帧ID: {result.get('frame_id', 'N/A')}]")
+                            print(f"FPS: {result.get('fps', 'N/A')}")
+                            print(f"检测到 {len(detections)} 个对象:")
+
+                            for i, det in enumerate(detections):
+                                print(f"  {i+1}. 类别: {det.get('class', 'unknown')}, "
+                                      f"置信度: {det.get('confidence', 0):.2f}, "
+                                      f"位置: x={det.get('x_center', 0):.2f}, y={det.get('y_center', 0):.2f}, "
+                                      f"大小: w={det.get('width', 0):.2f}, h={det.get('height', 0):.2f}")
                     elif data.get("type") == "ping":
                         print(".", end="", flush=True)
                     else:
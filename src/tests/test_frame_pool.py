@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from app.utils.frame_pool import FRAME_ALIGNMENT, FramePool
+
+
+def test_acquire_until_exhausted_and_release():
+    pool = FramePool(size=2)
+    a = pool.acquire((4, 4, 3))
+    b = pool.acquire((4, 4, 3))
+
+    assert a is not None and b is not None
+    assert a is not b
+    assert a.shape == (4, 4, 3) and a.dtype == np.uint8
+    assert pool.acquire((4, 4, 3)) is None
+
+    pool.release(a)
+    assert pool.acquire((4, 4, 3)) is a
+
+
+def test_slots_share_one_aligned_block():
+    pool = FramePool(size=3)
+    frames = [pool.acquire((2, 4, 3)) for _ in range(3)]
+
+    addresses = [frame.ctypes.data for frame in frames]
+    assert addresses[0] % FRAME_ALIGNMENT == 0
+    assert addresses == [addresses[0] + i * 2 * 4 * 3 for i in range(3)]
+    assert all(frame.flags.c_contiguous for frame in frames)
+
+
+def test_release_ignores_foreign_arrays():
+    pool = FramePool(size=1)
+    pool.acquire((2, 2, 3))
+
+    pool.release(np.zeros((2, 2, 3), dtype=np.uint8))
+    assert pool.available() == 0
+
+
+def test_shape_change_reallocates():
+    pool = FramePool(size=1)
+    pool.acquire((2, 2, 3))
+
+    frame = pool.acquire((4, 4, 3))
+    assert frame is not None
+    assert frame.shape == (4, 4, 3)
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        FramePool(size=0)
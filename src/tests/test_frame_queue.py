@@ -0,0 +1,90 @@
+import queue
+import sys
+import threading
+
+import pytest
+
+from app.utils.frame_queue import FrameQueue
+
+
+def test_put_get_fifo_order():
+    q = FrameQueue(maxsize=3)
+    q.put(1)
+    q.put(2)
+
+    assert q.qsize() == 2
+    assert q.get() == 1
+    assert q.get_nowait() == 2
+    assert q.empty()
+
+
+def test_put_drops_oldest_when_full():
+    q = FrameQueue(maxsize=2)
+    assert q.put("a") is False
+    assert q.put("b") is False
+    assert q.full()
+
+    assert q.put("c") is True
+    assert q.qsize() == 2
+    assert q.get_nowait() == "b"
+    assert q.get_nowait() == "c"
+
+
+def test_on_drop_receives_dropped_item():
+    dropped = []
+    q = FrameQueue(maxsize=1, on_drop=dropped.append)
+    q.put("a")
+    q.put("b")
+
+    assert dropped == ["a"]
+    assert q.get_nowait() == "b"
+
+
+def test_concurrent_producers_never_lose_items():
+    dropped = []
+    q = FrameQueue(maxsize=1, on_drop=dropped.append)
+    producers = [
+        threading.Thread(target=lambda base=base: [q.put(base + i) for i in range(2000)])
+        for base in range(0, 8000, 2000)
+    ]
+    # 缩短线程切换间隔，让生产者在 put 中途频繁交错
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # 每一帧要么留在队列中，要么经过 on_drop，不会被静默挤掉
+    assert q.qsize() == 1
+    assert len(dropped) + q.qsize() == 8000
+
+
+def test_get_nowait_raises_empty():
+    q = FrameQueue()
+    with pytest.raises(queue.Empty):
+        q.get_nowait()
+
+
+def test_get_timeout_raises_empty():
+    q = FrameQueue()
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0.01)
+
+
+def test_get_wakes_up_on_put_from_other_thread():
+    q = FrameQueue()
+    timer = threading.Timer(0.01, q.put, args=("frame",))
+    timer.start()
+    try:
+        assert q.get(timeout=1.0) == "frame"
+    finally:
+        timer.cancel()
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        FrameQueue(maxsize=0)
@@ -53,6 +53,17 @@ def test_read_frame_success(producer: GStreamerFrameProducer, frame_queue: queue
     assert video_frame.source_id == 1
     assert producer.frame_id_counter == 1
 
+def test_read_frame_converts_i420_to_bgr(producer: GStreamerFrameProducer, frame_queue: queue.Queue):
+    producer.start()
+    # I420 帧: (height * 3 / 2, width) 的二维数组
+    mock_i420 = np.full((480 * 3 // 2, 640), 128, dtype=np.uint8)
+    frame_queue.put((mock_i420, time.time_ns()))
+
+    video_frame = producer.read_frame()
+
+    assert video_frame is not None
+    assert video_frame.image.shape == (480, 640, 3)
+
 def test_read_frame_empty_queue(producer: GStreamerFrameProducer):
     producer.start()
     video_frame = producer.read_frame() # Queue is empty, timeout after 1s
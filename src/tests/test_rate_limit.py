@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import HTTPException
+
+from app.api import rate_limit
+from app.api.rate_limit import RateLimiter, parse_rate
+
+
+def make_request(host: str = "10.0.0.1"):
+    request = MagicMock()
+    request.client.host = host
+    return request
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60_000_000_000)
+    assert parse_rate("5/second") == (5, 1_000_000_000)
+    assert parse_rate("1/hours") == (1, 3_600_000_000_000)
+
+
+@pytest.mark.parametrize("rate", ["10", "abc/minute", "10/fortnight", "0/minute"])
+def test_parse_rate_invalid(rate: str):
+    with pytest.raises(ValueError):
+        parse_rate(rate)
+
+
+@pytest.mark.asyncio
+async def test_limit_rejects_after_burst():
+    limiter = RateLimiter()
+
+    @limiter.limit("2/minute")
+    async def endpoint(request):
+        return "ok"
+
+    request = make_request()
+    with patch("app.api.rate_limit.time.monotonic_ns", return_value=1_000):
+        assert await endpoint(request=request) == "ok"
+        assert await endpoint(request=request) == "ok"
+        with pytest.raises(HTTPException) as exc_info:
+            await endpoint(request=request)
+    assert exc_info.value.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_limit_refills_over_time_and_is_per_client():
+    limiter = RateLimiter()
+
+    @limiter.limit("1/second")
+    async def endpoint(request):
+        return "ok"
+
+    with patch("app.api.rate_limit.time.monotonic_ns", return_value=0):
+        assert await endpoint(request=make_request("a")) == "ok"
+        # 其他客户端拥有独立的令牌桶
+        assert await endpoint(request=make_request("b")) == "ok"
+        with pytest.raises(HTTPException):
+            await endpoint(request=make_request("a"))
+
+    with patch("app.api.rate_limit.time.monotonic_ns", return_value=1_000_000_000):
+        assert await endpoint(request=make_request("a")) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_prune_is_not_repeated_when_nothing_was_freed(monkeypatch):
+    monkeypatch.setattr("app.api.rate_limit.MAX_TRACKED_CLIENTS", 2)
+    limiter = RateLimiter()
+
+    @limiter.limit("1/minute")
+    async def endpoint(request):
+        return "ok"
+
+    with patch("app.api.rate_limit.time.monotonic_ns", return_value=0), \
+            patch("app.api.rate_limit._prune", wraps=rate_limit._prune) as prune:
+        for host in ("a", "b", "c"):
+            assert await endpoint(request=make_request(host)) == "ok"
+        # 三个桶都未回满，清理一次后阈值提高
+        assert prune.call_count == 1
+        assert await endpoint(request=make_request("d")) == "ok"
+        assert prune.call_count == 1
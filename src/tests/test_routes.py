@@ -0,0 +1,105 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.api.routes as routes
+
+
+@pytest.fixture
+def rtsp_server():
+    server = MagicMock()
+    server.is_running = True
+    server.get_client_count.return_value = 2
+    return server
+
+
+@pytest.fixture
+def video_service():
+    service = MagicMock()
+    service.get_health_status.return_value = {"healthy": True}
+    return service
+
+
+@pytest.fixture
+def client(rtsp_server, video_service, monkeypatch):
+    # 每个测试从空的健康检查缓存开始
+    monkeypatch.setattr(routes, "_health_cache", (float("-inf"), b""))
+    app = FastAPI()
+    routes.setup_app(app)
+    app.dependency_overrides[routes.get_rtsp_server] = lambda: rtsp_server
+    app.dependency_overrides[routes.get_video_service] = lambda: video_service
+    # 不使用 with 语句，不触发启动事件 (避免初始化 GStreamer)
+    return TestClient(app)
+
+
+def test_health_check_is_cached_within_ttl(client: TestClient, video_service):
+    with patch("app.api.routes.time.monotonic", return_value=100.0):
+        first = client.get("/api/v1/health")
+    with patch("app.api.routes.time.monotonic", return_value=100.0 + routes.HEALTH_CACHE_TTL / 2):
+        second = client.get("/api/v1/health")
+
+    assert first.status_code == 200
+    assert first.json()["status"] == "healthy"
+    assert first.json()["details"]["rtsp_server"] == "healthy"
+    assert second.content == first.content
+    video_service.get_health_status.assert_called_once()
+
+
+def test_health_check_refreshes_after_ttl(client: TestClient, rtsp_server, video_service):
+    with patch("app.api.routes.time.monotonic", return_value=100.0):
+        first = client.get("/api/v1/health")
+    rtsp_server.is_running = False
+    with patch("app.api.routes.time.monotonic", return_value=100.0 + routes.HEALTH_CACHE_TTL):
+        second = client.get("/api/v1/health")
+
+    assert first.json()["status"] == "healthy"
+    assert second.json()["status"] == "degraded"
+    assert video_service.get_health_status.call_count == 2
+
+
+def test_http_exception_body(client: TestClient):
+    response = client.get("/api/v1/snapshot")
+
+    assert response.status_code == 500
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert set(body) == {"error", "code", "timestamp"}
+    assert body["error"] == "获取视频帧失败"
+    assert body["code"] == 500
+
+
+def test_rate_limited_request_body(client: TestClient):
+    statuses = [client.get("/api/v1/status").status_code for _ in range(10)]
+
+    assert statuses == [200] * 10
+    response = client.get("/api/v1/status")
+    assert response.status_code == 429
+    body = response.json()
+    assert body["code"] == 429
+    assert body["error"] == "请求过于频繁，限制为 10/minute"
+
+
+def receive_reply(websocket):
+    """跳过连接管理器的保活 ping，返回下一条消息"""
+    while True:
+        message = websocket.receive_json()
+        if message["type"] != "ping":
+            return message
+
+
+def test_websocket_echoes_single_message(client: TestClient):
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        assert receive_reply(websocket)["type"] == "connection_status"
+        websocket.send_text("hello")
+        assert receive_reply(websocket) == {"type": "echo", "message": "hello"}
+
+
+def test_websocket_echoes_burst_as_batch(client: TestClient, monkeypatch):
+    # 放宽合并窗口，使两条连续发送的消息必定落入同一批
+    monkeypatch.setattr(routes, "WS_BATCH_WINDOW", 0.5)
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        assert receive_reply(websocket)["type"] == "connection_status"
+        websocket.send_text("a")
+        websocket.send_text("b")
+        assert receive_reply(websocket) == {"type": "echo", "messages": ["a", "b"]}
@@ -208,4 +208,15 @@ async def test_ping_clients_sends_ping(mock_sleep, manager: ConnectionManager):
             pass
     manager.is_running = False
 
-</rewritten_file> 
\ No newline at end of file
+
+@pytest.mark.asyncio
+async def test_broadcast_sends_to_all_clients_across_batches(manager: ConnectionManager, monkeypatch):
+    monkeypatch.setattr("app.services.websocket_manager.BROADCAST_BATCH_SIZE", 2)
+    sockets = [AsyncMock(spec=WebSocket) for _ in range(5)]
+    for i, ws in enumerate(sockets):
+        manager.active_connections[f"client{i}"] = ws
+
+    await manager.broadcast("hello")
+
+    for ws in sockets:
+        ws.send_text.assert_called_once_with("hello")
@@ -27,7 +27,7 @@ echo "正在使用虚拟环境中的 uvicorn 启动服务器..."
 # 使用 nohup 在后台运行，并将所有输出重定向到 /dev/null (不保留日志文件)
 # 如果您希望保留日志，可以将 /dev/null 替换为日志文件路径，例如 nohup.log
 # uvicorn 的 app.main:app 路径是相对于当前工作目录（即 src）的
-COMMAND_TO_RUN="nohup ${VENV_UVICORN_PATH} app.main:app --host 0.0.0.0 --port 58000 > /dev/null 2>&1 &"
+COMMAND_TO_RUN="nohup ${VENV_UVICORN_PATH} app.main:app --host 0.0.0.0 --port 58000 --loop uvloop > /dev/null 2>&1 &"
 
 echo "将要执行的命令: $COMMAND_TO_RUN"
 